@@ -4,33 +4,223 @@ Techstax Webhook Receiver — Flask application entry point.
 This app:
   1. Receives GitHub webhooks (push, pull_request) from action-repo.
   2. Stores events in MongoDB with the required schema.
-  3. Exposes an API for the UI to poll events every 15 seconds.
+  3. Exposes an API for the UI: a live SSE stream, with long-polling as
+     fallback.
   4. Serves the minimal UI (single HTML page).
 
 Run locally: flask run  (or: python app.py)
 Deploy: use the same app; set MONGO_URI and GITHUB_WEBHOOK_SECRET in env.
 """
 
-from flask import Flask, request, jsonify, render_template
+import threading
+import time
+import zlib
 
-from config import MONGO_URI, MONGO_DB_NAME
-from db import insert_event, get_db, get_events, delete_all_events
-from webhook_parser import parse_github_webhook
+from bson import ObjectId
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
+
+from config import (
+    MONGO_URI,
+    GITHUB_WEBHOOK_SECRET,
+    WEBHOOK_MAX_BODY_BYTES,
+    INGEST_BUFFER_ENABLED,
+    INGEST_BATCH_SIZE,
+    INGEST_FLUSH_INTERVAL_MS,
+    INGEST_MAX_PENDING,
+    SPOOL_DIR,
+    SPOOL_SEGMENT_BYTES,
+    SPOOL_DRAIN_INTERVAL_MS,
+    SPOOL_DRAIN_BATCH,
+    SPOOL_FSYNC,
+    SPOOL_MAX_DRAIN_ATTEMPTS,
+    DEDUP_CACHE_SIZE,
+    DEDUP_TTL_SECONDS,
+    SELECTIVE_PUSH_PARSE,
+    SELECTIVE_PARSE_MIN_BYTES,
+    INDEX_AUTO_CREATE,
+    FEED_LOOKBACK_SECONDS,
+    FEED_POLL_INTERVAL_MS,
+    SSE_HEARTBEAT_SECONDS,
+    SSE_MAX_STREAM_SECONDS,
+    SSE_MAX_STREAMS,
+    FEED_CHANGE_STREAM,
+    HOT_TAIL_SIZE,
+    LONGPOLL_MAX_WAIT_SECONDS,
+    LONGPOLL_MAX_WAITERS,
+)
+from compression import PrecompressedPage, compress_response
+from constants import GITHUB_EVENT_PUSH
+from dedup import DeliveryCache
+from event_feed import OVERFLOW, EventFeed
+from hot_tail import HotTail
+from indexes import index_report, start_index_provisioning
+from ingest_buffer import EventBuffer
+from json_provider import FastJSONProvider
+from log import bind, end_request, get_logger, kv, sampled, start_request
+from metrics import (
+    API_EVENTS_RESPONSES,
+    STAGE_DECODE,
+    STAGE_PARSE,
+    STAGE_SELECTIVE_PARSE,
+    STAGE_SIGNATURE,
+    STAGE_STORE,
+    WEBHOOK_REQUESTS,
+    event_label,
+    query_mode,
+    render as render_metrics,
+)
+from signature import SignatureVerifier
+from spool import EventSpool
+from storage import get_store
+from wire_format import encode_events, parse_fields, parse_format
+from webhook_parser import parse_github_webhook, extract_push_event
+
+logger = get_logger(__name__)
 
 # -----------------------------------------------------------------------------
 # App factory pattern: create Flask app and attach config
 # -----------------------------------------------------------------------------
 app = Flask(__name__)
 
+# orjson-backed JSON for request.get_json() / jsonify() (stdlib fallback)
+app.json = FastJSONProvider(app)
+
+# Event storage for STORAGE_BACKEND: MongoDB or in-memory (see storage.py)
+store = get_store()
+
+# Per-process tail of new events feeding the SSE stream (see event_feed.py)
+event_feed = EventFeed(
+    store.get_events,
+    store.get_latest_id,
+    poll_interval=FEED_POLL_INTERVAL_MS / 1000,
+    watch=store.watch_inserts if FEED_CHANGE_STREAM and store.can_watch else None,
+    lookback=FEED_LOOKBACK_SECONDS,
+)
+
+# Newest events kept in memory to answer after_id polls (see hot_tail.py)
+hot_tail = HotTail(capacity=HOT_TAIL_SIZE)
+
+
+def _prime_hot_tail(retry_interval=10.0):
+    while True:
+        try:
+            hot_tail.prime(event_feed, store.get_recent_events)
+            return
+        except Exception as e:
+            logger.warning("Hot tail priming failed, will retry", extra=kv(error=str(e)))
+            time.sleep(retry_interval)
+
+
+if HOT_TAIL_SIZE > 0:
+    threading.Thread(target=_prime_hot_tail, name="hot-tail-prime", daemon=True).start()
+
+
+def persist_events(events):
+    """Bulk-insert events and wake the event feed so streams see them now."""
+    inserted = store.insert_events(events)
+    event_feed.notify()
+    return inserted
+
+
+# Write-behind buffer: webhook deliveries are acked immediately and stored
+# in batches by a background flusher (see ingest_buffer.py).
+event_buffer = EventBuffer(
+    persist_events,
+    batch_size=INGEST_BATCH_SIZE,
+    flush_interval=INGEST_FLUSH_INTERVAL_MS / 1000,
+    max_pending=INGEST_MAX_PENDING,
+)
+
+# Durable spool: when SPOOL_DIR is set, events are written to local fsync'd
+# segments first and drained into MongoDB in the background (see spool.py).
+event_spool = None
+if SPOOL_DIR:
+    event_spool = EventSpool(
+        SPOOL_DIR,
+        persist_events,
+        segment_bytes=SPOOL_SEGMENT_BYTES,
+        drain_interval=SPOOL_DRAIN_INTERVAL_MS / 1000,
+        drain_batch=SPOOL_DRAIN_BATCH,
+        fsync=SPOOL_FSYNC,
+        max_attempts=SPOOL_MAX_DRAIN_ATTEMPTS,
+    )
+    # Drain segments left over from a previous run right away
+    event_spool.start()
+
+# Indexes for get_events / dedup are created in the background (indexes.py)
+if INDEX_AUTO_CREATE and store.name == "mongo":
+    start_index_provisioning()
+
+# HMAC key for X-Hub-Signature-256, prepared once and reused per request
+signature_verifier = SignatureVerifier(GITHUB_WEBHOOK_SECRET)
+
+# index.html, precompressed per encoding at maximum levels
+index_page = PrecompressedPage()
+
+# Recently seen X-GitHub-Delivery ids (redeliveries are acked but not stored)
+delivery_cache = DeliveryCache(max_size=DEDUP_CACHE_SIZE, ttl=DEDUP_TTL_SECONDS)
+
+
+def store_event(event_data):
+    """
+    Store an event via the durable spool (if configured) or the ingest buffer,
+    falling back to an inline insert when neither can take it (spool write
+    error, buffer disabled or full).
+    """
+    if event_spool is not None:
+        try:
+            event_spool.append(event_data)
+            return
+        except OSError as e:
+            logger.error("Spool write failed, inserting directly", extra=kv(error=str(e)))
+    elif INGEST_BUFFER_ENABLED and event_buffer.add(event_data):
+        return
+    store.insert_event(event_data)
+    event_feed.notify()
+
+
+def shutdown():
+    """
+    Flush buffered / spooled events while the MongoDB client is still open
+    (gunicorn worker_exit calls this before db.close_client).
+    """
+    if event_spool is not None:
+        event_spool.close()
+    event_buffer.close()
+
+
+@app.before_request
+def _start_request_log():
+    start_request(method=request.method, path=request.path)
+
+
+@app.after_request
+def _compress(response):
+    # gzip / br / zstd per Accept-Encoding (see compression.py)
+    return compress_response(response, request.accept_encodings)
+
+
+@app.teardown_request
+def _end_request_log(exc):
+    end_request()
+
+
 # We will add routes in the next steps:
 #  - POST /webhook          → receive GitHub webhook, save to MongoDB
 #  - GET  /api/events       → return events for UI (polling)
+#  - GET  /api/events/stream → push new events to the UI (SSE)
 #  - GET  /                 → serve the minimal UI page
 
 @app.route("/")
 def index():
-    """Serve the main UI page (minimal frontend)."""
-    return render_template("index.html")
+    """
+    Serve the main UI page (minimal frontend), rendered and compressed
+    once per process (re-rendered on every request in debug mode).
+    """
+    if app.debug or not index_page.loaded:
+        index_page.load(render_template("index.html").encode("utf-8"))
+    body, headers, status = index_page.select(request.accept_encodings, request.if_none_match)
+    return Response(body, status=status, headers=headers, mimetype="text/html")
 
 
 @app.route("/health")
@@ -39,14 +229,63 @@ def health():
     return {"status": "ok"}, 200
 
 
+@app.route("/ingest-stats")
+def ingest_stats():
+    """
+    Ingest metrics: buffer queue depth / flush latency, spool backlog,
+    dedup cache and hot-tail hit rates, open SSE streams.
+    """
+    return jsonify({
+        "enabled": INGEST_BUFFER_ENABLED,
+        **event_buffer.stats(),
+        "spool": event_spool.stats() if event_spool is not None else None,
+        "dedup": delivery_cache.stats(),
+        "hot_tail": hot_tail.stats(),
+        "sse": {"streams": event_feed.subscriber_count(), "max_streams": SSE_MAX_STREAMS},
+    }), 200
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Prometheus metrics: per-stage /webhook latency, get_events latency by
+    query mode, /api/events answer sources and MongoDB pool stats
+    (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set).
+    """
+    body, content_type = render_metrics()
+    return Response(body, headers={"Content-Type": content_type})
+
+
+@app.route("/admin/indexes")
+def admin_indexes():
+    """
+    Report declared vs existing indexes on the events collection:
+    missing ones, undeclared ones and indexes with no recorded usage.
+    """
+    if store.name != "mongo":
+        return jsonify({"status": "error",
+                        "message": f"No indexes to report for {store.name} storage"}), 400
+    try:
+        return jsonify({"status": "success", **index_report()}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route("/clear-events")
 def clear_events():
     """
-    Delete all events from MongoDB (for testing from 0 events).
+    Delete all stored events (for testing from 0 events).
     Visit: http://127.0.0.1:5000/clear-events
+    
+    This worker's hot tail is reloaded; other gunicorn workers keep serving
+    the deleted events from their hot tails until they restart.
     """
     try:
-        deleted = delete_all_events()
+        deleted = store.delete_all_events()
+        # Answered from the store until the reload finishes
+        hot_tail.reset()
+        if HOT_TAIL_SIZE > 0:
+            threading.Thread(target=_prime_hot_tail, name="hot-tail-prime", daemon=True).start()
         return jsonify({
             "status": "success",
             "message": f"Deleted {deleted} event(s). UI will show 0 events after refresh.",
@@ -59,34 +298,44 @@ def clear_events():
 @app.route("/test-db")
 def test_db():
     """
-    Test MongoDB connection (for local testing).
+    Test the storage connection (for local testing).
     
     Visit: http://127.0.0.1:5000/test-db
-    Should return connection status and database info.
+    Should return connection status and database info (for MongoDB:
+    database, host, collections and data size).
     """
     try:
-        # Try to connect to MongoDB
-        db = get_db()
-        # Get database stats
-        stats = db.command("dbStats")
+        # Connects on first use (MongoDB) and reads backend stats
+        stats = store.stats()
         
         return jsonify({
             "status": "success",
-            "message": "MongoDB connection successful!",
-            "database": MONGO_DB_NAME,
-            "uri": MONGO_URI.split("@")[-1] if "@" in MONGO_URI else MONGO_URI,  # Hide credentials
-            "collections": stats.get("collections", 0),
-            "dataSize": f"{stats.get('dataSize', 0) / 1024:.2f} KB"
+            "message": f"{store.name} storage connection successful!",
+            **stats,
         }), 200
     except Exception as e:
         return jsonify({
             "status": "error",
-            "message": "MongoDB connection failed",
+            "message": f"{store.name} storage connection failed",
             "error": str(e),
             "uri": MONGO_URI.split("@")[-1] if "@" in MONGO_URI else MONGO_URI
         }), 500
 
 
+def parse_large_push(event_type):
+    """
+    Selective extraction for push deliveries of at least
+    SELECTIVE_PARSE_MIN_BYTES: decodes only ref/after/pusher/head_commit
+    instead of the whole payload. Returns None when it does not apply or
+    cannot answer; the caller then runs the full JSON parser.
+    """
+    if (not SELECTIVE_PUSH_PARSE or event_type != GITHUB_EVENT_PUSH
+            or (request.content_length or 0) < SELECTIVE_PARSE_MIN_BYTES):
+        return None
+    with STAGE_SELECTIVE_PARSE.time():
+        return extract_push_event(request.get_data(cache=True))
+
+
 @app.route("/webhook", methods=["POST"])
 def handle_webhook():
     """
@@ -94,15 +343,37 @@ def handle_webhook():
     
     GitHub sends:
       - Header: X-GitHub-Event (event type: "push", "pull_request", etc.)
+      - Header: X-GitHub-Delivery (unique id per delivery, reused on redelivery)
+      - Header: X-Hub-Signature-256 (HMAC of the raw body, if a secret is set)
       - Body: JSON payload with event details
     
     Process:
-      1. Read event type from header
-      2. Parse JSON payload
-      3. Convert to MongoDB schema format
-      4. Store in MongoDB
+      1. Read event type and delivery id from headers
+      2. Verify the signature on the raw body (before any JSON parsing),
+         then parse JSON payload
+      3. Convert to MongoDB schema format (duplicates of an already
+         seen delivery id are acked without being stored again)
+      4. Queue for MongoDB (durable spool or write-behind buffer,
+         stored in batches by a background thread)
       5. Return success response
+    
+    Every delivery is counted in webhook_requests_total and each stage is
+    timed in webhook_stage_seconds (see GET /metrics).
     """
+    start = time.perf_counter()
+    event_type = request.headers.get("X-GitHub-Event", "")
+    bind(event_type=event_type, delivery_id=request.headers.get("X-GitHub-Delivery", ""))
+    response, status = _process_webhook()
+    WEBHOOK_REQUESTS.labels(event_label(event_type), str(status)).inc()
+    # One line per delivery with the request fields; successes are sampled
+    if status >= 400 or sampled():
+        logger.info("Webhook handled", extra=kv(
+            status=status, latency_ms=round((time.perf_counter() - start) * 1000, 3)))
+    return response, status
+
+
+def _process_webhook():
+    """handle_webhook body; returns (response, status code)."""
     try:
         # Get event type from GitHub header (e.g., "push", "pull_request")
         event_type = request.headers.get("X-GitHub-Event", "")
@@ -110,24 +381,56 @@ def handle_webhook():
         if not event_type:
             return jsonify({"error": "Missing X-GitHub-Event header"}), 400
         
-        # Get JSON payload
-        payload = request.get_json()
-        if not payload:
-            return jsonify({"error": "Missing JSON payload"}), 400
+        if request.content_length and request.content_length > WEBHOOK_MAX_BODY_BYTES:
+            return jsonify({"error": "Payload too large"}), 413
+        
+        # Verify signature over the raw bytes before parsing anything
+        if signature_verifier.enabled:
+            raw_body = request.get_data(cache=True)
+            signature = request.headers.get("X-Hub-Signature-256", "")
+            with STAGE_SIGNATURE.time():
+                verified = signature_verifier.verify(raw_body, signature)
+            if not verified:
+                return jsonify({"error": "Invalid signature"}), 401
         
-        # Handle GitHub ping event (webhook test)
-        if event_type == "ping":
-            return jsonify({"message": "Webhook endpoint is active"}), 200
+        # Large push bodies: read only the fields we store from the raw bytes
+        event_data = parse_large_push(event_type)
         
-        # Parse webhook payload and convert to MongoDB schema
-        event_data = parse_github_webhook(payload, event_type)
+        if event_data is None:
+            # Get JSON payload
+            with STAGE_DECODE.time():
+                # Empty or malformed bodies: None, answered 400 below (as in asgi_app.py)
+                payload = request.get_json(force=True, silent=True)
+            if not payload:
+                return jsonify({"error": "Missing JSON payload"}), 400
+            
+            # Handle GitHub ping event (webhook test)
+            if event_type == "ping":
+                return jsonify({"message": "Webhook endpoint is active"}), 200
+            
+            # Parse webhook payload and convert to MongoDB schema
+            with STAGE_PARSE.time():
+                event_data = parse_github_webhook(payload, event_type)
         
         if not event_data:
             # Event type not supported (e.g., "issues", "star", etc.)
             return jsonify({"message": f"Event type '{event_type}' not supported"}), 200
         
-        # Store event in MongoDB
-        insert_event(event_data)
+        # Idempotency: skip deliveries we have already stored
+        delivery_id = request.headers.get("X-GitHub-Delivery", "")
+        if delivery_id:
+            if not delivery_cache.check_and_add(delivery_id):
+                return jsonify({"message": "Duplicate delivery ignored"}), 200
+            event_data["delivery_id"] = delivery_id
+        
+        # Queue event for MongoDB (batched write-behind)
+        try:
+            with STAGE_STORE.time():
+                store_event(event_data)
+        except Exception:
+            if delivery_id:
+                delivery_cache.discard(delivery_id)  # let GitHub's retry through
+            raise
         
         return jsonify({
             "status": "success",
@@ -135,12 +438,66 @@ def handle_webhook():
             "author": event_data.get("author"),
         }), 200
         
-    except Exception as e:
+    except Exception:
         # Log error and return 500 (don't expose internal errors to GitHub)
-        print(f"❌ Webhook error: {e}")
+        logger.exception("Webhook error")
         return jsonify({"error": "Internal server error"}), 500
 
 
+def _events_etag():
+    """
+    ETag for /api/events: store generation (bumped by /clear-events), newest
+    event _id this process knows of (event feed high-water mark, plus the
+    count of events that arrived below it) and a hash of the query
+    parameters; weakened when the response is compressed.
+    Same tag = same answer, so it can be checked without querying MongoDB.
+    Starts the event feed on first use (the high-water mark only advances
+    while it runs); None if the newest _id cannot be read.
+    """
+    try:
+        event_feed.ensure_initialized()
+    except Exception as e:
+        logger.warning("Event feed unavailable, no ETag", extra=kv(error=str(e)))
+        return None
+    event_feed.start()
+    hwm = event_feed.high_water_mark or "0"
+    if event_feed.late_events:
+        hwm = f"{hwm}+{event_feed.late_events}"
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{store.generation}-{hwm}-{zlib.crc32(params.encode()):08x}"
+
+
+# Bounds the number of request threads parked in long-polls; beyond it,
+# requests with ?wait= are answered immediately like a normal poll, with
+# Retry-After so clients back off instead of re-polling right away.
+longpoll_slots = threading.BoundedSemaphore(LONGPOLL_MAX_WAITERS)
+LONGPOLL_BUSY_RETRY_SECONDS = 15
+
+
+def _long_poll(after_id):
+    """
+    Honour ?wait=<seconds> (capped at LONGPOLL_MAX_WAIT_SECONDS): park the
+    request until the event feed publishes something newer than after_id.
+    
+    Returns:
+        bool: False if a wait was asked for but every long-poll slot is
+              taken (the response then carries Retry-After).
+    """
+    try:
+        wait = min(float(request.args.get("wait", 0)), LONGPOLL_MAX_WAIT_SECONDS)
+    except ValueError:
+        return True
+    if wait <= 0 or not after_id or not ObjectId.is_valid(after_id):
+        return True
+    if not longpoll_slots.acquire(blocking=False):
+        return False
+    try:
+        event_feed.wait_for_newer(after_id, wait)
+    finally:
+        longpoll_slots.release()
+    return True
+
+
 @app.route("/api/events", methods=["GET"])
 def api_events():
     """
@@ -150,33 +507,84 @@ def api_events():
         - after_id (optional): MongoDB _id (string). Return only events inserted
                                after this id. Uses insertion order so no events
                                are missed when GitHub sends out-of-order timestamps.
+                               Recent cursors are answered from the in-memory
+                               hot tail without querying MongoDB.
+        - before_id (optional): MongoDB _id (string). Page backwards through
+                                history: the newest events inserted before
+                                this id (pass the last event's _id for the
+                                next older page).
         - since (optional): Legacy; UTC timestamp. Prefer after_id for polling.
         - limit (optional): Maximum number of events to return (default: 100).
+        - fields (optional): Comma-separated fields to return (_id is always
+                             included), e.g. fields=author,action,timestamp.
+        - format (optional): "json" (default, list of event objects) or
+                             "columnar" (arrays per field plus a shared
+                             string table; see wire_format.py).
+        - wait (optional): Long-poll, with after_id. Seconds (max
+                           LONGPOLL_MAX_WAIT_SECONDS) to hold the request
+                           until a new event is stored instead of returning
+                           an empty list right away. When all
+                           LONGPOLL_MAX_WAITERS slots are taken the answer
+                           comes at once with a Retry-After header.
+    
+    Conditional GET: responses carry an ETag; a request whose If-None-Match
+    still matches (no new event since) gets 304 Not Modified without a
+    database query.
     
     Returns:
-        JSON: events, count, latest_id (for next poll; use after_id=latest_id).
+        JSON: events (newest first) or columns, count, latest_id (for next
+              poll; use after_id=latest_id). 400 for an unknown field / format.
     """
     try:
+        try:
+            fields = parse_fields(request.args.get("fields"))
+            fmt = parse_format(request.args.get("format"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
         after_id = request.args.get("after_id", None)
+        # Wait not honoured (server busy): ask the client to slow down
+        busy = {} if _long_poll(after_id) else {"Retry-After": str(LONGPOLL_BUSY_RETRY_SECONDS)}
+        
+        # Computed before reading events: if one arrives meanwhile the tag is
+        # merely older than the body, which only costs the client a refetch
+        before_id = request.args.get("before_id", None)
         since_timestamp = request.args.get("since", None)
+        mode = query_mode(since_timestamp, after_id, before_id)
+        etag = _events_etag()
+        if etag and request.if_none_match.contains_weak(etag):
+            API_EVENTS_RESPONSES.labels(mode, "not_modified").inc()
+            response = app.response_class(status=304, headers=busy)
+            response.set_etag(etag)
+            return response
+        
         limit = int(request.args.get("limit", 100))
         
         # Prefer after_id (cursor-based) so we never miss events
-        events, latest_id = get_events(
-            after_id=after_id,
-            since_timestamp=since_timestamp if not after_id else None,
-            limit=limit,
-        )
+        result = hot_tail.query_after(after_id, limit) if after_id and limit > 0 else None
+        API_EVENTS_RESPONSES.labels(mode, "mongo" if result is None else "hot_tail").inc()
+        if result is None:
+            result = store.get_events(
+                after_id=after_id,
+                before_id=before_id if not after_id else None,
+                since_timestamp=since_timestamp if not (after_id or before_id) else None,
+                limit=limit,
+            )
+        events, latest_id = result
         
-        return jsonify({
+        response = jsonify({
             "status": "success",
-            "events": events,
+            **encode_events(events, fields, fmt),
             "count": len(events),
             "latest_id": latest_id,
-        }), 200
+        })
+        if etag:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response, 200, busy
         
     except Exception as e:
-        print(f"❌ API error: {e}")
+        logger.exception("API error")
         return jsonify({
             "status": "error",
             "message": "Failed to retrieve events",
@@ -184,6 +592,98 @@ def api_events():
         }), 500
 
 
+# Bounds the number of request threads held by SSE streams; beyond it,
+# clients get 503 and the UI long-polls instead (retrying the stream later).
+sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+
+def _sse_frame(event, cursor):
+    """One SSE message: id = cursor, the largest _id sent so far (becomes Last-Event-ID on reconnect)."""
+    return f"id: {cursor}\ndata: {app.json.dumps(event)}\n\n"
+
+
+@app.route("/api/events/stream", methods=["GET"])
+def api_events_stream():
+    """
+    Server-Sent Events stream of newly stored events (replaces polling).
+    
+    Resume point: the Last-Event-ID header (sent automatically by
+    EventSource on reconnect) or the after_id query parameter; both use the
+    same insertion-order cursor as /api/events?after_id=. Events after it
+    are replayed from MongoDB first, then new ones are pushed as they are
+    stored. Each message's id is the event _id.
+    
+    The stream ends after SSE_MAX_STREAM_SECONDS (or if the client falls
+    too far behind); EventSource then reconnects and resumes.
+    
+    At most SSE_MAX_STREAMS streams are open per worker; beyond that the
+    answer is 503 with Retry-After, so threads stay free for /webhook.
+    """
+    if not sse_slots.acquire(blocking=False):
+        return jsonify({"status": "error", "message": "Too many open streams; poll /api/events"}), \
+            503, {"Retry-After": "60"}
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("after_id")
+    # A malformed id is no resume point (get_events would read it as
+    # "from the start" and replay the whole collection)
+    last_id = last_id.lower() if last_id and ObjectId.is_valid(last_id) else None
+    try:
+        # Subscribe before catching up so nothing inserted in between is missed
+        subscription = event_feed.subscribe()
+    except Exception:
+        sse_slots.release()
+        raise
+    
+    def generate():
+        sent_id = last_id
+        caught_up = set()  # The feed may publish these again
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            # Catch up from the database (in insertion order)
+            while sent_id:
+                events, latest_id = store.get_events(after_id=sent_id, limit=100)
+                for event in reversed(events):
+                    caught_up.add(event["_id"])
+                    yield _sse_frame(event, event["_id"])
+                if not events:
+                    break
+                sent_id = latest_id
+            # Then push live events from the feed
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                batch = subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                if batch is OVERFLOW:
+                    return
+                if batch is None:
+                    yield ": keepalive\n\n"
+                    continue
+                for event in batch:
+                    # Events can arrive below sent_id (other writers), so
+                    # duplicates are recognised by _id, not by order
+                    if event["_id"] in caught_up:
+                        continue
+                    sent_id = max(sent_id or "", event["_id"])
+                    yield _sse_frame(event, sent_id)
+        finally:
+            event_feed.unsubscribe(subscription)
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    
+    def close():
+        # Runs when the server closes the response, even if generate() never started
+        event_feed.unsubscribe(subscription)
+        sse_slots.release()
+    
+    response.call_on_close(close)
+    return response
+
+
 # -----------------------------------------------------------------------------
 # Run with: flask run  or  python app.py
 # -----------------------------------------------------------------------------
@@ -0,0 +1,482 @@
+"""
+Techstax Webhook Receiver — asyncio (ASGI) serving mode.
+
+Same routes as app.py (/, /health, /webhook, /api/events,
+/api/events/stream) on Quart with PyMongo's async client, so a single
+process can hold thousands of concurrent pollers, long-polls, SSE streams
+and webhook deliveries without pinning a worker thread per request.
+
+Selected with SERVER_MODE=asgi (see serve.py); the WSGI app in app.py is
+unchanged and remains the default. Webhook events are inserted directly
+with the async driver (the write-behind buffer and disk spool are
+WSGI-mode features).
+
+Run locally: uvicorn asgi_app:app --port 5000
+"""
+
+import asyncio
+import time
+import zlib
+
+from bson import ObjectId
+from quart import Quart, Response, jsonify, render_template, request
+
+import async_db
+from config import (
+    GITHUB_WEBHOOK_SECRET,
+    WEBHOOK_MAX_BODY_BYTES,
+    DEDUP_CACHE_SIZE,
+    DEDUP_TTL_SECONDS,
+    SELECTIVE_PUSH_PARSE,
+    SELECTIVE_PARSE_MIN_BYTES,
+    MONGO_WARMUP,
+    INDEX_AUTO_CREATE,
+    FEED_LOOKBACK_SECONDS,
+    FEED_POLL_INTERVAL_MS,
+    SSE_HEARTBEAT_SECONDS,
+    SSE_MAX_STREAM_SECONDS,
+    LONGPOLL_MAX_WAIT_SECONDS,
+    STORAGE_BACKEND,
+)
+from compression import PrecompressedPage, compress_response_async
+from constants import GITHUB_EVENT_PUSH
+from dedup import DeliveryCache
+from event_feed import OVERFLOW, LookbackWindow
+from indexes import start_index_provisioning
+from json_provider import FastJSONProvider
+from log import bind, end_request, get_logger, kv, sampled, start_request
+from metrics import WEBHOOK_REQUESTS, event_label, render as render_metrics
+from signature import SignatureVerifier
+from storage import AsyncEventStore, get_store
+from wire_format import encode_events, parse_fields, parse_format
+from webhook_parser import parse_github_webhook, extract_push_event
+
+logger = get_logger(__name__)
+
+# Bodies at least this large are decoded in a worker thread so a huge push
+# payload does not stall every other connection on the event loop
+_OFFLOAD_PARSE_BYTES = 256 * 1024
+
+# Longest an SSE request waits for the event feed to learn the newest _id
+# (the database may be unreachable) before answering 503
+_FEED_READY_TIMEOUT = 5
+
+app = Quart(__name__)
+app.json = FastJSONProvider(app)
+
+# Native async driver for MongoDB; other backends through the storage
+# interface (see storage.py)
+store = async_db if STORAGE_BACKEND == "mongo" else AsyncEventStore(get_store())
+
+signature_verifier = SignatureVerifier(GITHUB_WEBHOOK_SECRET)
+delivery_cache = DeliveryCache(max_size=DEDUP_CACHE_SIZE, ttl=DEDUP_TTL_SECONDS)
+index_page = PrecompressedPage()
+
+
+class AsyncEventFeed:
+    """
+    asyncio counterpart of event_feed.EventFeed: one task per process tails
+    the collection by _id and fans new events out to SSE queues and
+    long-poll waiters.
+    """
+
+    def __init__(self, poll_interval=1.0, batch_size=100, max_batches=1000, lookback=2.0):
+        self._poll_interval = poll_interval
+        self._batch_size = batch_size
+        self._max_batches = max_batches
+        self._window = LookbackWindow(lookback)
+        self._hwm = None
+        self._ready = None
+        self._wakeup = None
+        self._published = None
+        self._subscribers = set()
+        self._task = None
+
+    @property
+    def high_water_mark(self):
+        return self._hwm if self._ready is not None and self._ready.is_set() else None
+
+    @property
+    def late_events(self):
+        return self._window.late
+
+    def start(self):
+        """Create the tail task (call from the running event loop)."""
+        self._ready = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._published = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def notify(self):
+        """Poll now (call after storing an event in this process)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_ready(self, timeout):
+        """True once the high-water mark is known, False after timeout seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def subscribe(self, timeout=_FEED_READY_TIMEOUT):
+        """
+        Queue of event batches for one SSE stream (high-water mark fixed
+        first), or None if the feed is not ready within timeout seconds.
+        """
+        if not await self.wait_ready(timeout):
+            return None
+        queue = asyncio.Queue(maxsize=self._max_batches)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    async def wait_for_newer(self, after_id, timeout):
+        """
+        Wait until an event newer than after_id is published (long-poll).
+        The whole wait, including the feed becoming ready, is bounded by
+        timeout.
+        """
+        deadline = time.monotonic() + timeout
+        if not await self.wait_ready(timeout):
+            return False
+        after_id = after_id.lower()
+        async with self._published:
+            try:
+                await asyncio.wait_for(
+                    self._published.wait_for(lambda: self._hwm is not None and self._hwm > after_id),
+                    max(0, deadline - time.monotonic()),
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def _run(self):
+        while not self._ready.is_set():
+            try:
+                self._hwm = await store.get_latest_id()
+                self._window.start(self._hwm)
+                self._ready.set()
+            except Exception as e:
+                logger.warning("Event feed init failed, will retry", extra=kv(error=str(e)))
+                await asyncio.sleep(5)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._poll()
+            except Exception as e:
+                logger.error("Event feed poll failed", extra=kv(error=str(e)))
+
+    async def _poll(self):
+        cursor = self._window.cursor(self._hwm)
+        while True:
+            events, latest_id = await store.get_events(after_id=cursor, limit=self._batch_size)
+            if not events:
+                break
+            cursor = latest_id
+            events.reverse()  # insertion order
+            page_size = len(events)
+            events = self._window.fresh(events, self._hwm)
+            if self._hwm is None or latest_id > self._hwm:
+                self._hwm = latest_id
+            if events:
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(events)
+                    except asyncio.QueueFull:
+                        # Slow consumer: replace its newest batch with OVERFLOW so
+                        # the stream ends and the client reconnects and catches up
+                        self._subscribers.discard(queue)
+                        queue.get_nowait()
+                        queue.put_nowait(OVERFLOW)
+                async with self._published:
+                    self._published.notify_all()
+            if page_size < self._batch_size:
+                break
+        self._window.settle()
+
+
+event_feed = AsyncEventFeed(poll_interval=FEED_POLL_INTERVAL_MS / 1000,
+                            lookback=FEED_LOOKBACK_SECONDS)
+
+
+@app.before_serving
+async def startup():
+    if MONGO_WARMUP:
+        app.add_background_task(store.warm_up)
+    # Same background index creation as app.py (delivery_id_unique backs dedup)
+    if INDEX_AUTO_CREATE and STORAGE_BACKEND == "mongo":
+        start_index_provisioning()
+    event_feed.start()
+
+
+@app.after_serving
+async def shutdown():
+    await event_feed.stop()
+    await store.close()
+
+
+@app.before_request
+async def _start_request_log():
+    start_request(method=request.method, path=request.path)
+
+
+@app.after_request
+async def _compress(response):
+    return await compress_response_async(response, request.accept_encodings)
+
+
+@app.teardown_request
+async def _end_request_log(exc):
+    end_request()
+
+
+@app.route("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics (see metrics.py; get_events and pool stats in this mode)."""
+    body, content_type = render_metrics()
+    return Response(body, headers={"Content-Type": content_type})
+
+
+@app.route("/")
+async def index():
+    """Serve the main UI page, rendered and compressed once (see app.py)."""
+    if app.debug or not index_page.loaded:
+        index_page.load((await render_template("index.html")).encode("utf-8"))
+    body, headers, status = index_page.select(request.accept_encodings, request.if_none_match)
+    return Response(body, status=status, headers=headers, mimetype="text/html")
+
+
+@app.route("/health")
+async def health():
+    """Simple health check for deployment platforms (e.g. Render, Railway)."""
+    return {"status": "ok", "mode": "asgi"}, 200
+
+
+def _parse_body(raw_body, event_type):
+    """
+    Decode and parse a webhook body (selective push extraction first, same
+    as app.py). Returns (event_data, payload_present).
+    """
+    if (SELECTIVE_PUSH_PARSE and event_type == GITHUB_EVENT_PUSH
+            and len(raw_body) >= SELECTIVE_PARSE_MIN_BYTES):
+        event_data = extract_push_event(raw_body)
+        if event_data is not None:
+            return event_data, True
+    try:
+        payload = app.json.loads(raw_body) if raw_body else None
+    except ValueError:
+        payload = None
+    if not payload:
+        return None, False
+    return parse_github_webhook(payload, event_type), True
+
+
+@app.route("/webhook", methods=["POST"])
+async def handle_webhook():
+    """
+    Receive GitHub webhook from action-repo (same contract as app.py):
+    signature check on the raw body, parse, dedup by X-GitHub-Delivery,
+    then an async insert.
+    """
+    start = time.perf_counter()
+    event_type = request.headers.get("X-GitHub-Event", "")
+    bind(event_type=event_type, delivery_id=request.headers.get("X-GitHub-Delivery", ""))
+    response, status = await _process_webhook(event_type)
+    WEBHOOK_REQUESTS.labels(event_label(event_type), str(status)).inc()
+    if status >= 400 or sampled():
+        logger.info("Webhook handled", extra=kv(
+            status=status, latency_ms=round((time.perf_counter() - start) * 1000, 3)))
+    return response, status
+
+
+async def _process_webhook(event_type):
+    """handle_webhook body; returns (response, status code)."""
+    try:
+        if not event_type:
+            return jsonify({"error": "Missing X-GitHub-Event header"}), 400
+
+        if request.content_length and request.content_length > WEBHOOK_MAX_BODY_BYTES:
+            return jsonify({"error": "Payload too large"}), 413
+
+        raw_body = await request.get_data()
+
+        # Verify signature over the raw bytes before parsing anything
+        if signature_verifier.enabled:
+            signature = request.headers.get("X-Hub-Signature-256", "")
+            if not signature_verifier.verify(raw_body, signature):
+                return jsonify({"error": "Invalid signature"}), 401
+
+        if len(raw_body) >= _OFFLOAD_PARSE_BYTES:
+            event_data, has_payload = await asyncio.to_thread(_parse_body, raw_body, event_type)
+        else:
+            event_data, has_payload = _parse_body(raw_body, event_type)
+
+        if not has_payload:
+            return jsonify({"error": "Missing JSON payload"}), 400
+        if event_type == "ping":
+            return jsonify({"message": "Webhook endpoint is active"}), 200
+        if not event_data:
+            return jsonify({"message": f"Event type '{event_type}' not supported"}), 200
+
+        # Idempotency: skip deliveries we have already stored
+        delivery_id = request.headers.get("X-GitHub-Delivery", "")
+        if delivery_id:
+            if not delivery_cache.check_and_add(delivery_id):
+                return jsonify({"message": "Duplicate delivery ignored"}), 200
+            event_data["delivery_id"] = delivery_id
+
+        try:
+            await store.insert_event(event_data)
+        except Exception:
+            if delivery_id:
+                delivery_cache.discard(delivery_id)
+            raise
+        event_feed.notify()
+
+        return jsonify({
+            "status": "success",
+            "event": event_data.get("action"),
+            "author": event_data.get("author"),
+        }), 200
+
+    except Exception:
+        logger.exception("Webhook error")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _events_etag():
+    """ETag for /api/events: feed high-water mark + query parameter hash (see app.py)."""
+    hwm = event_feed.high_water_mark
+    if hwm is None:
+        return None
+    if event_feed.late_events:
+        hwm = f"{hwm}+{event_feed.late_events}"
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{hwm}-{zlib.crc32(params.encode()):08x}"
+
+
+@app.route("/api/events", methods=["GET"])
+async def api_events():
+    """
+    Events for the UI (same parameters as app.py: after_id, before_id,
+    since, limit, fields, format, wait). Long-polls only park a coroutine,
+    not a thread.
+    """
+    try:
+        try:
+            fields = parse_fields(request.args.get("fields"))
+            fmt = parse_format(request.args.get("format"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        after_id = request.args.get("after_id", None)
+        before_id = request.args.get("before_id", None)
+        since_timestamp = request.args.get("since", None)
+        limit = int(request.args.get("limit", 100))
+
+        try:
+            wait = min(float(request.args.get("wait", 0)), LONGPOLL_MAX_WAIT_SECONDS)
+        except ValueError:
+            wait = 0
+        if wait > 0 and after_id and ObjectId.is_valid(after_id):
+            await event_feed.wait_for_newer(after_id, wait)
+
+        etag = _events_etag()
+        if etag and request.if_none_match.contains_weak(etag):
+            response = app.response_class("", status=304)
+            response.set_etag(etag)
+            return response
+
+        events, latest_id = await store.get_events(
+            after_id=after_id,
+            before_id=before_id if not after_id else None,
+            since_timestamp=since_timestamp if not (after_id or before_id) else None,
+            limit=limit,
+        )
+
+        response = jsonify({
+            "status": "success",
+            **encode_events(events, fields, fmt),
+            "count": len(events),
+            "latest_id": latest_id,
+        })
+        if etag:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response, 200
+
+    except Exception as e:
+        logger.exception("API error")
+        return jsonify({
+            "status": "error",
+            "message": "Failed to retrieve events",
+            "error": str(e)
+        }), 500
+
+
+def _sse_frame(event, cursor):
+    return f"id: {cursor}\ndata: {app.json.dumps(event)}\n\n"
+
+
+@app.route("/api/events/stream", methods=["GET"])
+async def api_events_stream():
+    """Server-Sent Events stream of new events (same protocol as app.py)."""
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("after_id")
+    # Malformed ids are ignored rather than replaying the whole collection
+    last_id = last_id.lower() if last_id and ObjectId.is_valid(last_id) else None
+    queue = await event_feed.subscribe()
+    if queue is None:
+        # Feed not ready (database unreachable): the UI falls back to polling
+        return jsonify({"status": "error", "message": "Event feed unavailable"}), \
+            503, {"Retry-After": "60"}
+
+    async def generate():
+        sent_id = last_id
+        caught_up = set()
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            while sent_id:
+                events, latest_id = await store.get_events(after_id=sent_id, limit=100)
+                for event in reversed(events):
+                    caught_up.add(event["_id"])
+                    yield _sse_frame(event, event["_id"])
+                if not events:
+                    break
+                sent_id = latest_id
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    batch = await asyncio.wait_for(queue.get(), min(SSE_HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if batch is OVERFLOW:
+                    return
+                for event in batch:
+                    if event["_id"] in caught_up:
+                        continue
+                    sent_id = max(sent_id or "", event["_id"])
+                    yield _sse_frame(event, sent_id)
+        finally:
+            event_feed.unsubscribe(queue)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None  # streams outlive Quart's default response timeout
+    return response
@@ -0,0 +1,112 @@
+"""
+Async MongoDB operations for the ASGI serving mode (asgi_app.py).
+
+Mirrors the event helpers in db.py on PyMongo's native asyncio client
+(AsyncMongoClient). Query plans and result shaping come from
+query_planner.py, like db.py, so both serving modes return identical data.
+"""
+
+import time
+
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import MONGO_URI, MONGO_DB_NAME
+from constants import EVENTS_COLLECTION
+from db import client_options, skip_duplicates
+from log import get_logger, kv, sampled
+from metrics import GET_EVENTS_SECONDS, INSERT_MANY, INSERT_ONE
+from query_planner import PROJECTION, plan_events
+
+logger = get_logger(__name__)
+
+# Created lazily inside the running event loop (one per server process)
+_client = None
+
+
+def get_async_db():
+    """Get the async MongoDB database (client is created on first use)."""
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(MONGO_URI, **client_options())
+    return _client[MONGO_DB_NAME]
+
+
+def get_events_collection():
+    """Get the events collection (async)."""
+    return get_async_db()[EVENTS_COLLECTION]
+
+
+async def warm_up():
+    """Connect at server startup instead of on the first request (see db.warm_up)."""
+    start = time.perf_counter()
+    try:
+        await get_async_db().command("ping")
+    except Exception as e:
+        logger.error("MongoDB warm-up failed", extra=kv(error=str(e)))
+        return False
+    logger.info("MongoDB pool warmed up",
+                extra=kv(latency_ms=round((time.perf_counter() - start) * 1000, 1)))
+    return True
+
+
+async def insert_event(event_data):
+    """
+    Insert a webhook event document (see db.insert_event).
+
+    Returns:
+        ObjectId: Inserted document ID, or None for a duplicate delivery_id.
+    """
+    try:
+        with INSERT_ONE.time():
+            result = await get_events_collection().insert_one(event_data)
+    except DuplicateKeyError:
+        logger.info("Duplicate delivery ignored", extra=kv(delivery_id=event_data.get("delivery_id")))
+        return None
+    if sampled():
+        logger.info("Stored event", extra=kv(action=event_data.get("action"),
+                                              author=event_data.get("author")))
+    return result.inserted_id
+
+
+async def insert_events(events):
+    """Insert a batch of events with one insert_many (see db.insert_events)."""
+    if not events:
+        return []
+    try:
+        with INSERT_MANY.time():
+            result = await get_events_collection().insert_many(events, ordered=False)
+        inserted_ids = result.inserted_ids
+    except BulkWriteError as e:
+        inserted_ids = skip_duplicates(e, events)
+    if sampled():
+        logger.info("Stored event batch", extra=kv(count=len(inserted_ids)))
+    return inserted_ids
+
+
+async def get_events(since_timestamp=None, after_id=None, limit=100, before_id=None):
+    """
+    Retrieve webhook events (same arguments and result as db.get_events).
+
+    Returns:
+        tuple: (events list, latest_id str or None).
+    """
+    plan = plan_events(since_timestamp, after_id, before_id, limit)
+    cursor = get_events_collection().find(plan.mongo_filter(), PROJECTION).sort(plan.mongo_sort())
+    with GET_EVENTS_SECONDS.labels(plan.mode).time():
+        events = await cursor.limit(plan.limit).to_list() if plan.limit else []
+    return plan.finish(events)
+
+
+async def get_latest_id():
+    """Newest event _id (insertion order) as a string, or None if empty."""
+    doc = await get_events_collection().find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return str(doc["_id"]) if doc else None
+
+
+async def close():
+    """Close the async client (server shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,268 @@
+"""
+Micro-benchmarks for the webhook hot path.
+
+Usage:
+    python benchmark.py signature     # X-Hub-Signature-256 verify cost per KB
+    python benchmark.py json          # stdlib json vs fast provider throughput
+    python benchmark.py selective     # selective push extraction vs full decode
+    python benchmark.py parser        # webhook_parser ns/event + peak bytes vs baseline
+    python benchmark.py parser --save-baseline   # re-record parser_baseline.json
+
+Numbers are wall-clock on the current machine; compare runs on the same box.
+The parser baseline is machine-specific: record it on the box that runs the
+comparison (CI runner or your laptop) and commit it with parser changes.
+"""
+
+import argparse
+import gc
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from flask import Flask
+
+from json_provider import FastJSONProvider
+from payload_generator import make_pull_request_payload, make_push_payload
+from signature import SignatureVerifier
+from webhook_parser import (
+    _parse_pull_request_event,
+    _parse_push_event,
+    _timestamp_to_utc,
+    extract_push_event,
+    parse_github_webhook,
+)
+
+BENCH_SECRET = "benchmark-secret"
+
+PARSER_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_baseline.json")
+
+
+# -----------------------------------------------------------------------------
+# Response builders (webhook payloads come from payload_generator.py)
+# -----------------------------------------------------------------------------
+def make_api_events_envelope(n_events):
+    """Response body of /api/events with n_events events."""
+    events = [{
+        "_id": "65a5f0c2e4b0a1b2c3d4%04x" % i,
+        "request_id": hashlib.sha1(str(i).encode()).hexdigest(),
+        "author": f"dev{i % 7}",
+        "action": ("PUSH", "PULL_REQUEST", "MERGE")[i % 3],
+        "from_branch": "feature",
+        "to_branch": "main",
+        "timestamp": "2026-01-15 10:%02d:00 UTC" % (i % 60),
+    } for i in range(n_events)]
+    return {"status": "success", "events": events, "count": n_events,
+            "latest_id": events[-1]["_id"] if events else None}
+
+
+def _bench(fn, min_time=0.5):
+    """Run fn repeatedly for at least min_time seconds; return seconds per call."""
+    fn()  # warm up
+    n, start = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / n
+
+
+# -----------------------------------------------------------------------------
+# Benchmarks
+# -----------------------------------------------------------------------------
+def bench_signature(args):
+    """Verify cost for bodies from 1 KB to ~10 MB: reused key vs fresh hmac.new."""
+    verifier = SignatureVerifier(BENCH_SECRET)
+    key = BENCH_SECRET.encode()
+    print(f"{'body':>10} {'verify (us)':>12} {'us/KB':>8} {'fresh hmac.new (us)':>20}")
+    for n_commits in (1, 20, 300, 3000):
+        body = json.dumps(make_push_payload(n_commits)).encode()
+        header = verifier.sign(body)
+
+        def fresh(body=body, header=header):
+            mac = hmac.new(key, body, hashlib.sha256).hexdigest()
+            return hmac.compare_digest("sha256=" + mac, header)
+
+        reused = _bench(lambda: verifier.verify(body, header), args.min_time)
+        naive = _bench(fresh, args.min_time)
+        kb = len(body) / 1024
+        print(f"{kb:>8.1f}KB {reused * 1e6:>12.1f} {reused * 1e6 / kb:>8.3f} {naive * 1e6:>20.1f}")
+
+
+def bench_json(args):
+    """Decode webhook bodies and encode /api/events responses: stdlib vs fast provider."""
+    app = Flask(__name__)
+    stdlib = app.json
+    fast = FastJSONProvider(app)
+    if not fast.native:
+        print("orjson not installed: fast provider falls back to stdlib json")
+    cases = [
+        ("push, 20 commits", make_push_payload(20)),
+        ("push, 300 commits", make_push_payload(300)),
+        ("pull_request", make_pull_request_payload()),
+    ]
+    print(f"{'decode':<22} {'size':>9} {'stdlib MB/s':>12} {'fast MB/s':>10} {'speedup':>8}")
+    for name, payload in cases:
+        body = json.dumps(payload).encode()
+        mb = len(body) / 1e6
+        t_std = _bench(lambda: stdlib.loads(body), args.min_time)
+        t_fast = _bench(lambda: fast.loads(body), args.min_time)
+        print(f"{name:<22} {len(body) / 1024:>7.1f}KB {mb / t_std:>12.1f} {mb / t_fast:>10.1f} "
+              f"{t_std / t_fast:>7.1f}x")
+
+    print(f"\n{'encode /api/events':<22} {'events':>9} {'stdlib (us)':>12} {'fast (us)':>10} {'speedup':>8}")
+    with app.app_context():
+        for n in (0, 100, 1000):
+            envelope = make_api_events_envelope(n)
+            t_std = _bench(lambda: stdlib.response(envelope), args.min_time)
+            t_fast = _bench(lambda: fast.response(envelope), args.min_time)
+            print(f"{'':<22} {n:>9} {t_std * 1e6:>12.1f} {t_fast * 1e6:>10.1f} {t_std / t_fast:>7.1f}x")
+
+
+def _peak_kb(fn):
+    """Peak traced allocation of one fn() call, in KB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_selective(args):
+    """Push parsing: selective extraction from raw bytes vs full decode + parse."""
+    fast = FastJSONProvider(Flask(__name__))
+    print(f"{'commits':>8} {'size':>10} {'full (us)':>10} {'selective (us)':>15} "
+          f"{'full peak KB':>13} {'sel. peak KB':>13}")
+    for n_commits in (1, 20, 300, 3000):
+        body = json.dumps(make_push_payload(n_commits)).encode()
+        full = lambda: parse_github_webhook(fast.loads(body), "push")
+        selective = lambda: extract_push_event(body)
+        assert full() == selective()
+        t_full = _bench(full, args.min_time)
+        t_sel = _bench(selective, args.min_time)
+        print(f"{n_commits:>8} {len(body) / 1024:>8.1f}KB {t_full * 1e6:>10.1f} {t_sel * 1e6:>15.1f} "
+              f"{_peak_kb(full):>13.1f} {_peak_kb(selective):>13.1f}")
+
+
+def _parser_cases():
+    """(name, fn) pairs covering every webhook_parser entry point."""
+    push_small = make_push_payload(1)
+    push_medium = make_push_payload(20)
+    push_huge = make_push_payload(3000)
+    huge_body = json.dumps(push_huge).encode()
+    pr_opened = make_pull_request_payload(action="opened")
+    pr_merged = make_pull_request_payload(action="closed", merged=True)
+    pr_ignored = make_pull_request_payload(action="synchronize")
+    return [
+        ("parse push (1 commit)", lambda: parse_github_webhook(push_small, "push")),
+        ("parse push (20 commits)", lambda: parse_github_webhook(push_medium, "push")),
+        ("parse push (3000 commits)", lambda: parse_github_webhook(push_huge, "push")),
+        ("parse pull_request opened", lambda: parse_github_webhook(pr_opened, "pull_request")),
+        ("parse pull_request merged", lambda: parse_github_webhook(pr_merged, "pull_request")),
+        ("parse pull_request ignored", lambda: parse_github_webhook(pr_ignored, "pull_request")),
+        ("parse unsupported event", lambda: parse_github_webhook(push_small, "issues")),
+        ("_parse_push_event", lambda: _parse_push_event(push_medium)),
+        ("_parse_pull_request_event", lambda: _parse_pull_request_event(pr_opened)),
+        ("_timestamp_to_utc offset", lambda: _timestamp_to_utc("2026-01-15T10:05:00+05:30")),
+        ("_timestamp_to_utc Z", lambda: _timestamp_to_utc("2026-01-15T10:05:00Z")),
+        ("_timestamp_to_utc missing", lambda: _timestamp_to_utc("")),
+        ("extract_push_event (3000 commits)", lambda: extract_push_event(huge_body)),
+    ]
+
+
+def _peak_bytes(fn):
+    """Peak traced allocation of one fn() call, in bytes."""
+    return int(_peak_kb(fn) * 1024)
+
+
+def bench_parser(args):
+    """
+    webhook_parser cost per event: best-of-N ns/event and peak bytes
+    allocated per call. Compared against parser_baseline.json; a case
+    slower (or allocating more) than baseline * (1 + tolerance) fails the
+    run with exit code 1.
+    """
+    def measure(fn, rounds):
+        # Best of several rounds with the cyclic GC paused: the minimum is
+        # the least noisy estimate of the parser's own cost
+        gc.disable()
+        try:
+            return min(_bench(fn, args.min_time / args.rounds) for _ in range(rounds)) * 1e9
+        finally:
+            gc.enable()
+
+    cases = _parser_cases()
+    results = {}
+    for name, fn in cases:
+        results[name] = {
+            "ns_per_event": round(measure(fn, args.rounds), 1),
+            "peak_bytes": min(_peak_bytes(fn) for _ in range(3)),
+        }
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline for {len(results)} cases to {args.baseline}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    limit = 1 + args.tolerance
+    regressions = []
+    print(f"{'case':<36} {'ns/event':>10} {'baseline':>10} {'ratio':>7} {'peak B':>8} {'baseline':>9}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36} {r['ns_per_event']:>10.1f} {'-':>10} {'-':>7} {r['peak_bytes']:>8} {'-':>9}")
+            continue
+        ratio = r["ns_per_event"] / base["ns_per_event"] if base["ns_per_event"] else 1.0
+        if ratio > limit and not args.save_baseline:
+            # Confirm before failing: re-measure with more rounds, keep the best
+            r["ns_per_event"] = round(min(r["ns_per_event"], measure(dict(cases)[name], args.rounds * 3)), 1)
+            ratio = r["ns_per_event"] / base["ns_per_event"]
+        slow = ratio > limit
+        # Small absolute slack so a few bytes of interpreter noise do not fail the run
+        fat = r["peak_bytes"] > base["peak_bytes"] * limit + 256
+        flag = "  <-- REGRESSION" if slow or fat else ""
+        print(f"{name:<36} {r['ns_per_event']:>10.1f} {base['ns_per_event']:>10.1f} {ratio:>6.2f}x "
+              f"{r['peak_bytes']:>8} {base['peak_bytes']:>9}{flag}")
+        if flag:
+            regressions.append(name)
+    if regressions:
+        print(f"\n❌ {len(regressions)} parser regression(s) beyond {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No parser regressions beyond {args.tolerance:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook hot-path micro-benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to run each measurement (default: 0.5)")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    sub.add_parser("signature", help="HMAC verify cost per KB").set_defaults(func=bench_signature)
+    sub.add_parser("json", help="JSON decode/encode throughput").set_defaults(func=bench_json)
+    sub.add_parser("selective", help="selective push extraction").set_defaults(func=bench_selective)
+    parser_cmd = sub.add_parser("parser", help="webhook_parser ns/event and allocations vs baseline")
+    parser_cmd.add_argument("--baseline", default=PARSER_BASELINE, help="baseline JSON path")
+    parser_cmd.add_argument("--save-baseline", action="store_true", help="record a new baseline")
+    parser_cmd.add_argument("--rounds", type=int, default=7,
+                            help="timing rounds per case; the fastest counts (default: 7)")
+    parser_cmd.add_argument("--tolerance", type=float, default=0.5,
+                            help="allowed slowdown / growth before failing (default: 0.5; "
+                                 "sub-microsecond timings jitter by 20-40%% on shared machines)")
+    parser_cmd.set_defaults(func=bench_parser)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
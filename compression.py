@@ -0,0 +1,264 @@
+"""
+HTTP response compression for the API and UI.
+
+The encoding is negotiated from Accept-Encoding among gzip (stdlib) and,
+when their packages are installed, brotli ("br") and zstd; on equal
+q-values COMPRESS_ENCODINGS decides. Levels depend on the kind of body:
+
+  - dynamic (API responses): moderate levels, compressed per request.
+  - stream (SSE): fast levels, flushed after every chunk so each event
+    reaches the browser immediately.
+  - static (index.html): maximum levels, compressed once per process and
+    served from memory (PrecompressedPage).
+
+Bodies under COMPRESS_MIN_BYTES are sent as is. Compressible responses
+always carry Vary: Accept-Encoding, and their ETags become weak (the
+bytes differ per encoding; If-None-Match uses weak comparison anyway).
+"""
+
+import gzip
+import hashlib
+import threading
+import zlib
+
+from config import COMPRESSION_ENABLED, COMPRESS_MIN_BYTES, COMPRESS_ENCODINGS
+
+try:
+    import brotli
+except ImportError:  # Optional dependency: br is not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: zstd is not offered
+    zstandard = None
+
+# Levels per encoding (gzip 1-9, brotli quality 0-11, zstd 1-22)
+DYNAMIC_LEVELS = {"gzip": 6, "br": 5, "zstd": 3}
+STREAM_LEVELS = {"gzip": 1, "br": 1, "zstd": 1}
+STATIC_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+# Content types worth compressing (without parameters such as charset)
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/event-stream",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+
+def _available():
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return tuple(name for name in COMPRESS_ENCODINGS if installed.get(name))
+
+
+# Encodings this process can produce, in server preference order
+ENCODINGS = _available()
+
+
+def negotiate(accept_encodings):
+    """
+    Pick the response encoding.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding
+                          (werkzeug Accept, request.accept_encodings).
+
+    Returns:
+        str or None: "zstd", "br" or "gzip", or None to send identity.
+    """
+    best, best_quality = None, 0
+    for name in ENCODINGS:
+        quality = accept_encodings[name]
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(data, encoding, level):
+    """Compress a complete body."""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+
+class StreamCompressor:
+    """Incremental compressor whose output is flushed after every chunk."""
+
+    def __init__(self, encoding, level):
+        self._encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding {encoding!r}")
+
+    def compress(self, chunk):
+        """Compressed bytes for chunk, decodable by the client right away."""
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if self._encoding == "gzip":
+            return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self._encoding == "br":
+            return self._obj.process(chunk) + self._obj.flush()
+        return self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        """End of stream trailer."""
+        if self._encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compressible(response):
+    """True if the response's content type is worth compressing."""
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+
+def prepare(response, accept_encodings):
+    """
+    Decide whether a response gets compressed and mark it for caches.
+
+    Returns:
+        str or None: Encoding to apply, or None to leave the body alone.
+    """
+    if not COMPRESSION_ENABLED or not compressible(response):
+        return None
+    response.vary.add("Accept-Encoding")
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers):
+        return None
+    return negotiate(accept_encodings)
+
+
+def mark_encoded(response, encoding):
+    """Set Content-Encoding and weaken the ETag of a compressed response."""
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of chunks (SSE), flushing after each one."""
+    compressor = StreamCompressor(encoding, STREAM_LEVELS[encoding])
+    try:
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        # Client gone: close the wrapped generator so its cleanup runs
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response, accept_encodings):
+    """
+    Flask after_request helper: compress the body (or wrap the stream) in
+    the negotiated encoding.
+
+    Returns:
+        Response: The same response object.
+    """
+    encoding = prepare(response, accept_encodings)
+    if encoding is None or response.direct_passthrough:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        mark_encoded(response, encoding)
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding, DYNAMIC_LEVELS[encoding]))
+    mark_encoded(response, encoding)
+    return response
+
+
+class PrecompressedPage:
+    """
+    A static page compressed once per encoding at the static levels and
+    served from memory, with a weak ETag for conditional requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._body = None
+        self._etag = None
+        self._variants = {}
+
+    @property
+    def loaded(self):
+        return self._body is not None
+
+    def load(self, body):
+        """Set the page body (bytes); compressed variants are built on demand."""
+        with self._lock:
+            self._body = body
+            self._etag = hashlib.sha1(body).hexdigest()[:16]
+            self._variants = {}
+
+    def select(self, accept_encodings, if_none_match):
+        """
+        Body and headers for one request.
+
+        Returns:
+            tuple: (body bytes, headers dict, status code); 304 with an
+                   empty body when if_none_match still matches.
+        """
+        headers = {"Vary": "Accept-Encoding", "ETag": f'W/"{self._etag}"'}
+        if if_none_match.contains_weak(self._etag):
+            return b"", headers, 304
+        encoding = negotiate(accept_encodings) if COMPRESSION_ENABLED else None
+        if encoding is None or len(self._body) < COMPRESS_MIN_BYTES:
+            return self._body, headers, 200
+        variant = self._variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self._variants.get(encoding)
+                if variant is None:
+                    variant = compress(self._body, encoding, STATIC_LEVELS[encoding])
+                    self._variants[encoding] = variant
+        headers["Content-Encoding"] = encoding
+        return variant, headers, 200
+
+
+async def compress_response_async(response, accept_encodings):
+    """Quart after_request counterpart of compress_response."""
+    from quart.wrappers.response import DataBody, IterableBody
+
+    encoding = prepare(response, accept_encodings)
+    if encoding is None:
+        return response
+    if not isinstance(response.response, DataBody):
+        response.response = IterableBody(_compress_body_async(response.response, encoding))
+        response.headers.pop("Content-Length", None)
+        mark_encoded(response, encoding)
+        return response
+    data = await response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding, DYNAMIC_LEVELS[encoding]))
+    mark_encoded(response, encoding)
+    return response
+
+
+async def _compress_body_async(body, encoding):
+    compressor = StreamCompressor(encoding, STREAM_LEVELS[encoding])
+    async with body as chunks:
+        async for chunk in chunks:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
@@ -18,6 +18,121 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 # Database name where we store webhook events
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "webhook_events")
 
+# Where events are stored (see storage.py): "mongo", "sqlite" (embedded
+# file, WAL mode) or "memory" (in-process, no external services; single
+# worker, lost on restart). Defaults to sqlite when MONGO_URI is a
+# sqlite:/// URI (e.g. sqlite:///events.db), otherwise mongo.
+STORAGE_BACKEND = os.getenv(
+    "STORAGE_BACKEND", "sqlite" if MONGO_URI.startswith("sqlite:") else "mongo"
+).lower()
+# SQLite: how long a write waits for another worker's transaction
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# MongoClient connection pool and timeouts (per process; see db.client_options).
+# 0 for the idle / socket timeouts means "no limit".
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+# Wire compression, comma-separated in preference order: zstd, snappy, zlib
+# (zstd / snappy need the zstandard / python-snappy packages). Empty = off.
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_RETRY_WRITES = os.getenv("MONGO_RETRY_WRITES", "true").lower() in ("1", "true", "yes")
+MONGO_RETRY_READS = os.getenv("MONGO_RETRY_READS", "true").lower() in ("1", "true", "yes")
+# Connect and fill the pool at worker start (gunicorn post_fork / ASGI
+# startup) instead of on the first request
+MONGO_WARMUP = os.getenv("MONGO_WARMUP", "true").lower() in ("1", "true", "yes")
+
 # Optional: GitHub webhook secret for verifying payload signatures (HMAC)
 # If set, we validate X-Hub-Signature-256; if empty, we skip validation (dev only)
 GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+
+# Largest webhook body we accept (GitHub caps payloads at 25 MB)
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(25 * 1024 * 1024)))
+
+# Write-behind ingest buffer: /webhook acks immediately and events are
+# flushed to MongoDB with insert_many when a batch fills up or the
+# flush interval elapses. Set INGEST_BUFFER_ENABLED=false to insert inline.
+INGEST_BUFFER_ENABLED = os.getenv("INGEST_BUFFER_ENABLED", "true").lower() in ("1", "true", "yes")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+INGEST_FLUSH_INTERVAL_MS = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", "200"))
+# Max queued events; beyond this /webhook falls back to a synchronous insert
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "10000"))
+
+# Durable local spool (write-ahead log). When SPOOL_DIR is set, /webhook
+# appends events to fsync'd segment files before acking and a background
+# drainer replays them into MongoDB in bulk (takes precedence over the
+# in-memory ingest buffer). Leave empty to disable.
+SPOOL_DIR = os.getenv("SPOOL_DIR", "")
+SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+SPOOL_DRAIN_INTERVAL_MS = int(os.getenv("SPOOL_DRAIN_INTERVAL_MS", "1000"))
+SPOOL_DRAIN_BATCH = int(os.getenv("SPOOL_DRAIN_BATCH", "500"))
+SPOOL_FSYNC = os.getenv("SPOOL_FSYNC", "true").lower() in ("1", "true", "yes")
+# Failed drain passes before a segment that keeps failing (while others
+# drain) is renamed to .seg.failed
+SPOOL_MAX_DRAIN_ATTEMPTS = int(os.getenv("SPOOL_MAX_DRAIN_ATTEMPTS", "5"))
+
+# Dedup cache for X-GitHub-Delivery ids: duplicates seen within the TTL are
+# rejected without touching MongoDB (a unique index backs it up).
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", "10000"))
+DEDUP_TTL_SECONDS = int(os.getenv("DEDUP_TTL_SECONDS", "3600"))
+
+# Selective push parsing: push bodies of at least SELECTIVE_PARSE_MIN_BYTES
+# are parsed by extracting only the fields we store from the raw bytes
+# (commits[] is never decoded). Smaller bodies are faster to decode fully.
+SELECTIVE_PUSH_PARSE = os.getenv("SELECTIVE_PUSH_PARSE", "true").lower() in ("1", "true", "yes")
+SELECTIVE_PARSE_MIN_BYTES = int(os.getenv("SELECTIVE_PARSE_MIN_BYTES", "65536"))
+
+# Create the events collection indexes in the background at startup
+INDEX_AUTO_CREATE = os.getenv("INDEX_AUTO_CREATE", "true").lower() in ("1", "true", "yes")
+
+# Live updates: the per-process event feed polls MongoDB for new events
+# (or right away after a local insert) and pushes them to SSE clients.
+FEED_POLL_INTERVAL_MS = int(os.getenv("FEED_POLL_INTERVAL_MS", "1000"))
+# Seconds of _ids the feed re-reads on each poll: with several writer
+# processes, events can be stored slightly out of _id order (0 = one writer)
+FEED_LOOKBACK_SECONDS = float(os.getenv("FEED_LOOKBACK_SECONDS", "2"))
+# SSE: comment line sent when idle, and max stream length before the client
+# is asked to reconnect (it resumes from Last-Event-ID)
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = int(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+# Open streams per worker (each holds a thread in wsgi mode); beyond it
+# clients get 503 and the UI falls back to polling. SSE_MAX_STREAMS plus
+# LONGPOLL_MAX_WAITERS should leave WEB_THREADS room for /webhook.
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "16"))
+# Wake the feed from a MongoDB change stream so events stored by other
+# workers show up immediately (replica sets / Atlas; polling otherwise)
+FEED_CHANGE_STREAM = os.getenv("FEED_CHANGE_STREAM", "true").lower() in ("1", "true", "yes")
+
+# Hot tail: newest events kept in memory per process to answer
+# /api/events?after_id= without MongoDB. 0 disables.
+HOT_TAIL_SIZE = int(os.getenv("HOT_TAIL_SIZE", "1000"))
+
+# Long-poll (/api/events?after_id=X&wait=N): longest hold, and how many
+# requests may be parked at once (keep below the gunicorn thread count)
+LONGPOLL_MAX_WAIT_SECONDS = int(os.getenv("LONGPOLL_MAX_WAIT_SECONDS", "30"))
+LONGPOLL_MAX_WAITERS = int(os.getenv("LONGPOLL_MAX_WAITERS", "8"))
+
+# Serving mode for serve.py / Procfile: "wsgi" (gunicorn + gthread, app.py)
+# or "asgi" (uvicorn + asyncio, asgi_app.py; one event loop per worker)
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Threads per gunicorn worker in wsgi mode (each SSE stream / long-poll
+# holds one; stay within MONGO_MAX_POOL_SIZE)
+WEB_THREADS = int(os.getenv("WEB_THREADS", "32"))
+
+# Logging (log.py): level, output format ("json" lines or "text" for local
+# development) and the fraction of per-event success logs that are emitted
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Response compression (see compression.py): negotiated from
+# Accept-Encoding, preference order below (br / zstd need the brotli /
+# zstandard packages); bodies smaller than COMPRESS_MIN_BYTES are not compressed
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_ENCODINGS = [e.strip().lower() for e in os.getenv("COMPRESS_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
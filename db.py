@@ -5,45 +5,176 @@ Handles connecting to MongoDB and provides helper functions
 for storing and retrieving webhook events.
 """
 
-from bson import ObjectId
+import atexit
+import os
+import threading
+import time
+
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import (
+    BulkWriteError,
+    ConnectionFailure,
+    DuplicateKeyError,
+    ServerSelectionTimeoutError,
+)
 
-from config import MONGO_URI, MONGO_DB_NAME
+from config import (
+    MONGO_URI,
+    MONGO_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS,
+    MONGO_RETRY_WRITES,
+    MONGO_RETRY_READS,
+)
 from constants import EVENTS_COLLECTION
+from log import get_logger, kv, sampled
+from metrics import GET_EVENTS_SECONDS, INSERT_MANY, INSERT_ONE, PoolMetricsListener
+from query_planner import PROJECTION, plan_events, shape_event
+
+logger = get_logger(__name__)
 
-# Global MongoDB client (initialized once, reused)
+# Per-process MongoDB client registry. MongoClient is thread-safe but not
+# fork-safe: each process (gunicorn worker) creates its own client on first
+# use, guarded by a lock so concurrent first requests share one pool.
 _client = None
 _db = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# Pool events → mongo_pool_* metrics (shared by the sync and async clients)
+_pool_listener = PoolMetricsListener()
+
+# MongoDB error code for a unique index violation
+_DUPLICATE_KEY = 11000
+
+
+def client_options():
+    """
+    MongoClient keyword arguments from config (shared with async_db.py).
+
+    Returns:
+        dict: Pool size, timeouts, compressors, retry settings and the
+              pool metrics listener.
+    """
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "retryWrites": MONGO_RETRY_WRITES,
+        "retryReads": MONGO_RETRY_READS,
+        "tz_aware": True,
+        "event_listeners": [_pool_listener],
+    }
+    # 0 means "no limit", which MongoClient expresses as None
+    options["maxIdleTimeMS"] = MONGO_MAX_IDLE_TIME_MS or None
+    options["socketTimeoutMS"] = MONGO_SOCKET_TIMEOUT_MS or None
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
 
 
 def get_db():
     """
     Get MongoDB database instance (creates connection if needed).
     
+    Safe to call from any thread; after a fork the child ignores the
+    parent's client and connects again.
+    
     Returns:
         Database: MongoDB database object.
     
     Raises:
         ConnectionFailure: If MongoDB connection fails.
     """
-    global _client, _db
+    global _client, _db, _client_pid
+    
+    # Fast path: no lock once this process is connected
+    db = _db
+    if db is not None and _client_pid == os.getpid():
+        return db
     
-    if _db is None:
+    with _client_lock:
+        pid = os.getpid()
+        if _db is not None and _client_pid == pid:
+            return _db
+        # A client inherited from the parent is dropped, not closed: its
+        # sockets and monitor threads belong to the parent process
+        _client = _db = None
+        client = MongoClient(MONGO_URI, **client_options())
         try:
-            # Create MongoDB client (reuse connection)
-            _client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-            # Test connection
-            _client.server_info()
-            # Get database
-            _db = _client[MONGO_DB_NAME]
-            print(f"✅ Connected to MongoDB: {MONGO_DB_NAME}")
+            # Test connection (server selection + first pooled connection)
+            client.admin.command("ping")
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-            print(f"❌ MongoDB connection failed: {e}")
-            print(f"   URI: {MONGO_URI}")
+            client.close()
+            logger.error("MongoDB connection failed",
+                         extra=kv(error=str(e), uri=MONGO_URI.split("@")[-1]))
             raise
-    
-    return _db
+        _client, _client_pid = client, pid
+        _db = client[MONGO_DB_NAME]
+        logger.info("Connected to MongoDB", extra=kv(database=MONGO_DB_NAME))
+        return _db
+
+
+def close_client():
+    """
+    Close this process's MongoDB client (worker exit / interpreter exit).
+    A later get_db() reconnects.
+    """
+    global _client, _db, _client_pid
+    with _client_lock:
+        client = _client
+        owned = _client_pid == os.getpid()
+        _client = _db = _client_pid = None
+    if client is not None and owned:
+        client.close()
+
+
+def use_client(client):
+    """
+    Install an already-built client for this process instead of connecting
+    to MONGO_URI (e.g. an in-memory mongomock client for load tests).
+    """
+    global _client, _db, _client_pid
+    with _client_lock:
+        _client, _client_pid = client, os.getpid()
+        _db = client[MONGO_DB_NAME]
+
+
+# Registered at import, so it runs after the ingest buffer / spool atexit
+# flushes (atexit is last-in, first-out)
+atexit.register(close_client)
+
+
+def warm_up():
+    """
+    Connect now instead of on the first request: server selection, TLS and
+    auth handshake happen here, and MongoClient then tops the pool up to
+    MONGO_MIN_POOL_SIZE in the background. Call once per process after fork.
+
+    Returns:
+        bool: True if MongoDB answered.
+    """
+    start = time.perf_counter()
+    try:
+        get_db()
+    except Exception:
+        return False  # get_db already logged it; requests will retry
+    logger.info("MongoDB pool warmed up",
+                extra=kv(latency_ms=round((time.perf_counter() - start) * 1000, 1)))
+    return True
+
+
+def start_warm_up():
+    """Run warm_up() in a background thread so worker boot is not delayed."""
+    threading.Thread(target=warm_up, name="mongo-warm-up", daemon=True).start()
 
 
 def get_events_collection():
@@ -68,69 +199,138 @@ def insert_event(event_data):
             - action (str): PUSH, PULL_REQUEST, or MERGE
             - from_branch (str): Source branch
             - to_branch (str): Target branch
-            - timestamp (str): UTC datetime string
+            - timestamp (datetime): UTC datetime (stored as BSON date)
+            - delivery_id (str, optional): X-GitHub-Delivery header value
     
     Returns:
-        ObjectId: MongoDB document ID of inserted event.
+        ObjectId: MongoDB document ID of inserted event, or None if an event
+                  with the same delivery_id is already stored.
     
     Raises:
         ConnectionFailure: If MongoDB connection fails.
     """
     collection = get_events_collection()
-    result = collection.insert_one(event_data)
-    print(f"✅ Stored event: {event_data.get('action')} by {event_data.get('author')}")
+    try:
+        with INSERT_ONE.time():
+            result = collection.insert_one(event_data)
+    except DuplicateKeyError:
+        logger.info("Duplicate delivery ignored", extra=kv(delivery_id=event_data.get("delivery_id")))
+        return None
+    if sampled():
+        logger.info("Stored event", extra=kv(action=event_data.get("action"),
+                                              author=event_data.get("author")))
     return result.inserted_id
 
 
-def get_events(since_timestamp=None, after_id=None, limit=100):
+def insert_events(events):
+    """
+    Insert a batch of webhook event documents with a single insert_many.
+    
+    Used by the write-behind ingest buffer so a burst of deliveries costs
+    one round trip per batch instead of one per event. The insert is
+    unordered, so events whose delivery_id already exists are skipped
+    without failing the rest of the batch.
+    
+    Args:
+        events (list[dict]): Event documents (same schema as insert_event).
+    
+    Returns:
+        list: MongoDB document IDs of inserted events (duplicates excluded).
+    """
+    if not events:
+        return []
+    collection = get_events_collection()
+    try:
+        with INSERT_MANY.time():
+            inserted_ids = collection.insert_many(events, ordered=False).inserted_ids
+    except BulkWriteError as e:
+        inserted_ids = skip_duplicates(e, events)
+    if sampled():
+        logger.info("Stored event batch", extra=kv(count=len(inserted_ids)))
+    return inserted_ids
+
+
+def skip_duplicates(error, events):
+    """
+    Handle a BulkWriteError from an unordered insert_many of events: if
+    every failure is a duplicate delivery_id, return the ids that were
+    inserted; otherwise re-raise the error.
+    """
+    errors = error.details.get("writeErrors", [])
+    if any(err.get("code") != _DUPLICATE_KEY for err in errors):
+        raise error
+    duplicates = {err["index"] for err in errors}
+    logger.info("Skipped duplicate deliveries in batch", extra=kv(count=len(duplicates)))
+    return [ev["_id"] for i, ev in enumerate(events) if i not in duplicates]
+
+
+def get_events(since_timestamp=None, after_id=None, limit=100, before_id=None):
     """
     Retrieve webhook events from MongoDB.
     
     Args:
         since_timestamp (str, optional): Only return events after this timestamp
-                                        (UTC datetime string). Deprecated for
-                                        polling; use after_id to avoid missing events.
+                                        ("YYYY-MM-DD HH:MM:SS UTC" or ISO 8601).
+                                        Deprecated for polling; use after_id to
+                                        avoid missing events.
         after_id (str, optional): MongoDB _id (string). Only return events inserted
                                   after this id. Uses insertion order so no events
                                   are missed when GitHub sends out-of-order timestamps.
         limit (int): Maximum number of events to return (default: 100).
+        before_id (str, optional): MongoDB _id (string). Page backwards: the
+                                   newest events inserted before this id.
     
     Returns:
         tuple: (events list, latest_id str or None).
-               events: sorted by timestamp (newest first). Each has _id as string.
+               events: newest first; by insertion order (_id) for after_id /
+                       before_id pages, by timestamp otherwise. Only the
+                       displayed fields, with _id as string and timestamp
+                       formatted as "YYYY-MM-DD HH:MM:SS UTC".
                latest_id: the _id of the newest event in the batch (for next poll).
     """
     collection = get_events_collection()
-    
-    if after_id:
-        # Cursor-based: get events inserted after this _id (never miss events)
-        try:
-            query = {"_id": {"$gt": ObjectId(after_id)}}
-        except Exception:
-            query = {}
-        cursor = collection.find(query).sort("_id", 1).limit(limit)  # insertion order
-        events = list(cursor)
-        # Sort by timestamp for display (newest first)
-        events.sort(key=lambda e: (e.get("timestamp") or "", e["_id"]), reverse=True)
-        latest_id = str(max(e["_id"] for e in events)) if events else None
-    else:
-        # Initial load or legacy: get most recent events by timestamp
-        query = {}
-        if since_timestamp:
-            query["timestamp"] = {"$gt": since_timestamp}
-        cursor = collection.find(query).sort([
-            ("timestamp", -1),
-            ("_id", -1)
-        ]).limit(limit)
-        events = list(cursor)
-        # latest_id = max _id in batch so next poll gets only newer insertions
-        latest_id = str(max(e["_id"] for e in events)) if events else None
-    
-    # Convert ObjectId to string for JSON
+    plan = plan_events(since_timestamp, after_id, before_id, limit)
+    with GET_EVENTS_SECONDS.labels(plan.mode).time():
+        cursor = collection.find(plan.mongo_filter(), PROJECTION).sort(plan.mongo_sort())
+        # limit=0 means "no limit" to MongoDB; here it means no events
+        events = list(cursor.limit(plan.limit)) if plan.limit else []
+    return plan.finish(events)
+
+
+def get_latest_id():
+    """
+    Return the newest event _id (insertion order) as a string, or None if
+    the collection is empty. Used to start tailing new events from "now".
+    """
+    collection = get_events_collection()
+    doc = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return str(doc["_id"]) if doc else None
+
+
+def get_recent_events(limit=1000):
+    """
+    Return the newest events by insertion order (_id), oldest first, with
+    the same fields and string conversion as get_events. Used to prime the
+    hot tail.
+    """
+    collection = get_events_collection()
+    events = list(collection.find({}, PROJECTION).sort("_id", -1).limit(limit))
+    events.reverse()
     for event in events:
-        event["_id"] = str(event["_id"])
-    
-    return events, latest_id
+        shape_event(event)
+    return events
+
+
+def watch_inserts(callback):
+    """
+    Block on a MongoDB change stream and call callback() for every inserted
+    event (from any process). Requires a replica set / Atlas; raises
+    OperationFailure on a standalone server.
+    """
+    collection = get_events_collection()
+    with collection.watch([{"$match": {"operationType": "insert"}}]) as stream:
+        for _change in stream:
+            callback()
 
 
 def delete_all_events():
@@ -0,0 +1,62 @@
+"""
+In-memory dedup cache for GitHub delivery ids (X-GitHub-Delivery).
+
+Redeliveries and retries usually arrive within minutes of the original,
+so a bounded LRU with a TTL rejects the common duplicate case without a
+MongoDB round trip. The unique index on delivery_id (see indexes.py) remains
+the source of truth across workers and restarts.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DeliveryCache:
+    """
+    Thread-safe LRU + TTL set of recently seen delivery ids.
+
+    Args:
+        max_size (int): Max ids kept; the least recently seen are evicted.
+        ttl (float): Seconds an id is remembered.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self._max_size = max(1, max_size)
+        self._ttl = ttl
+        self._entries = OrderedDict()  # delivery_id -> expiry (monotonic)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def check_and_add(self, delivery_id):
+        """
+        Record a delivery id.
+
+        Returns:
+            bool: True if the id is new (process the delivery),
+                  False if it was seen within the TTL (duplicate).
+        """
+        now = time.monotonic()
+        with self._lock:
+            expiry = self._entries.get(delivery_id)
+            if expiry is not None and expiry > now:
+                self._entries.move_to_end(delivery_id)
+                self.hits += 1
+                return False
+            self._entries[delivery_id] = now + self._ttl
+            self._entries.move_to_end(delivery_id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+            self.misses += 1
+            return True
+
+    def discard(self, delivery_id):
+        """Forget an id (e.g. storing the event failed, so a retry must pass)."""
+        with self._lock:
+            self._entries.pop(delivery_id, None)
+
+    def stats(self):
+        """Cache size and hit/miss counters."""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,337 @@
+"""
+Per-process feed of newly stored events.
+
+One background thread per process tails the events collection by _id (the
+same after_id cursor the UI uses) and fans new events out to subscribers
+such as the /api/events/stream SSE endpoint. Local inserts call notify() so
+they are published right away; events stored by other workers are picked
+up on the next poll, or right away when a MongoDB change stream is
+available (replica sets). Open streams therefore cost one query per poll
+interval per process instead of one query per client.
+
+ObjectIds only sort in insertion order within one writer process. With
+several (gunicorn workers, the spool drainer) an event can become visible
+a moment after a larger _id, below the high-water mark the feed has
+already passed, so each poll re-reads the last few seconds of _ids
+(LookbackWindow). after_id cursors held by clients have the same blind
+spot: an event whose _id sorts below a client's cursor is only seen by
+clients that reload the list or follow the SSE stream.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from log import get_logger, kv
+
+logger = get_logger(__name__)
+
+# Sentinel put on a subscriber's queue when it fell too far behind
+OVERFLOW = object()
+
+# Cursor below every ObjectId (tail from the start of an empty collection)
+_MIN_ID = "0" * 24
+
+
+def _id_at(ts):
+    """Lowest ObjectId hex string generated at Unix time ts."""
+    return f"{int(ts):08x}" + "0" * 16
+
+
+class Subscription:
+    """Queue of event batches for one consumer (e.g. one SSE connection)."""
+
+    def __init__(self, max_batches):
+        self._queue = queue.Queue(maxsize=max_batches)
+        self.overflowed = False
+
+    def put(self, batch):
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            # Slow consumer: tell it to reconnect and catch up from the DB
+            self.overflowed = True
+
+    def get(self, timeout):
+        """
+        Next batch of events (list, oldest first), OVERFLOW, or None if
+        nothing arrived within timeout seconds.
+        """
+        if self.overflowed:
+            return OVERFLOW
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LookbackWindow:
+    """
+    Lets a feed publish events whose _id arrives out of order, once.
+
+    Each poll reads from `seconds` before the previous poll started (or from
+    the high-water mark, if that is lower) and skips the ids it has already
+    published. Ids below settled_id have all been published.
+
+    Args:
+        seconds (float): How long after its _id was generated an event may
+                         still become visible; 0 trusts _id order (single
+                         writer process).
+    """
+
+    def __init__(self, seconds):
+        self._seconds = seconds
+        self._seen = set()      # ids published at or above the current floor
+        self._base = _MIN_ID    # high-water mark when the feed started
+        self._polled_at = None  # wall-clock start of the last complete poll
+        self._poll_start = None
+        self.settled_id = None
+        self.late = 0           # events published below the high-water mark
+
+    def start(self, hwm):
+        """Record the starting high-water mark; older events are not published."""
+        self._base = hwm or _MIN_ID
+        self._polled_at = time.time()
+        if self._seconds:
+            self.settled_id = self._base
+
+    def cursor(self, hwm):
+        """after_id to start the next poll from."""
+        self._poll_start = time.time()
+        if not self._seconds:
+            return hwm or _MIN_ID
+        floor = max(self._base, _id_at(self._polled_at - self._seconds))
+        self._seen = {event_id for event_id in self._seen if event_id > floor}
+        return min(hwm or _MIN_ID, floor)
+
+    def fresh(self, events, hwm):
+        """
+        Events (ascending _id) not published yet, recorded as published.
+
+        Args:
+            events (list): A page read from cursor().
+            hwm (str): High-water mark before this page.
+        """
+        if not self._seconds:
+            return events
+        events = [event for event in events if event["_id"] not in self._seen]
+        self._seen.update(event["_id"] for event in events)
+        if hwm:
+            self.late += sum(1 for event in events if event["_id"] < hwm)
+        return events
+
+    def settle(self):
+        """Mark the poll started by the last cursor() call as complete."""
+        self._polled_at = self._poll_start
+        if self._seconds:
+            self.settled_id = max(self._base, _id_at(self._poll_start - self._seconds))
+
+
+class EventFeed:
+    """
+    Tails new events and publishes them to subscribers and listeners.
+
+    Args:
+        fetch (callable): fetch(after_id, limit) -> (events, latest_id),
+                          i.e. db.get_events with the after_id cursor.
+        latest (callable): latest() -> newest _id string or None, used to
+                           start tailing from "now".
+        poll_interval (float): Seconds between polls when not notified.
+        batch_size (int): Max events fetched per query.
+        max_batches (int): Per-subscriber queue bound.
+        watch (callable, optional): watch(callback) blocks and calls
+                                    callback() whenever another process
+                                    inserts an event (db.watch_inserts, a
+                                    MongoDB change stream). Used only as a
+                                    wake-up signal; the _id query stays the
+                                    source of truth. If it raises, the feed
+                                    keeps polling on its interval.
+        lookback (float): Seconds of _ids re-read on every poll to catch
+                          events stored out of _id order by other writer
+                          processes (see LookbackWindow); 0 with a single
+                          writer.
+    """
+
+    def __init__(self, fetch, latest, poll_interval=1.0, batch_size=100, max_batches=1000,
+                 watch=None, lookback=2.0):
+        self._fetch = fetch
+        self._latest = latest
+        self._watch = watch
+        self._poll_interval = poll_interval
+        self._batch_size = batch_size
+        self._max_batches = max_batches
+
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._published = threading.Condition()
+        self._wakeup = threading.Event()
+        self._subscribers = set()
+        self._listeners = []
+        self._thread = None
+        self._pid = None
+        self._hwm = None
+        self._initialized = False
+        self._window = LookbackWindow(lookback)
+
+    @property
+    def high_water_mark(self):
+        """_id (string) of the newest event this process has seen, or None."""
+        return self._hwm
+
+    @property
+    def settled_id(self):
+        """
+        Every event with a smaller _id has been published (None: every
+        event up to the high-water mark). Events at or above it may still
+        show up out of order.
+        """
+        return self._window.settled_id
+
+    @property
+    def late_events(self):
+        """Number of events published below the high-water mark so far."""
+        return self._window.late
+
+    def start(self):
+        """Start the tail thread (once per process; safe to call after fork)."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="event-feed", daemon=True)
+            self._thread.start()
+            if self._watch is not None:
+                threading.Thread(target=self._run_watch, name="event-feed-watch", daemon=True).start()
+
+    def notify(self):
+        """Poll now (call after storing events in this process)."""
+        self._wakeup.set()
+
+    def subscribe(self):
+        """
+        Register a consumer; call unsubscribe() when it goes away.
+
+        The high-water mark is established before this returns, so a caller
+        that subscribes first and then catches up from the database cannot
+        miss events in between.
+        """
+        self.ensure_initialized()
+        self.start()
+        sub = Subscription(self._max_batches)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def add_listener(self, fn):
+        """Call fn(events) synchronously for every published batch."""
+        with self._lock:
+            self._listeners.append(fn)
+        self.start()
+
+    def wait_for_newer(self, after_id, timeout):
+        """
+        Block until an event newer than after_id has been published, or
+        timeout seconds pass (long-poll support). Waiters share one
+        condition variable that is notified on every published batch, so an
+        idle waiter costs no queries.
+
+        Returns:
+            bool: True if something newer than after_id exists.
+        """
+        self.ensure_initialized()
+        self.start()
+        after_id = after_id.lower()
+        with self._published:
+            return self._published.wait_for(
+                lambda: self._hwm is not None and self._hwm > after_id, timeout
+            )
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self._poll_interval)
+            self._wakeup.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("Event feed poll failed", extra=kv(error=str(e)))
+
+    def _run_watch(self, retry_interval=30.0):
+        warned = False
+        while True:
+            try:
+                self._watch(self.notify)
+            except Exception as e:
+                # e.g. standalone mongod (change streams need a replica set)
+                if not warned:
+                    logger.warning("Change stream unavailable, polling instead",
+                                   extra=kv(poll_interval=self._poll_interval, error=str(e)))
+                    warned = True
+            time.sleep(retry_interval)
+
+    def ensure_initialized(self):
+        """Fix the starting high-water mark (newest _id right now) if not done yet."""
+        if self._initialized:
+            return
+        with self._poll_lock:
+            if not self._initialized:
+                self._hwm = self._latest()
+                self._window.start(self._hwm)
+                self._initialized = True
+
+    def poll(self):
+        """
+        Fetch events newer than the high-water mark and publish them.
+
+        Returns:
+            int: Number of events published.
+        """
+        self.ensure_initialized()
+        with self._poll_lock:
+            return self._poll_locked()
+
+    def _poll_locked(self):
+        published = 0
+        cursor = self._window.cursor(self._hwm)
+        while True:
+            events, latest_id = self._fetch(after_id=cursor, limit=self._batch_size)
+            if not events:
+                break
+            cursor = latest_id
+            events.reverse()  # after_id pages are newest first; consumers want insertion order
+            page_size = len(events)
+            events = self._window.fresh(events, self._hwm)
+            if self._hwm is None or latest_id > self._hwm:
+                self._hwm = latest_id
+            if events:
+                self._publish(events)
+                published += len(events)
+            if page_size < self._batch_size:
+                break
+        self._window.settle()
+        return published
+
+    def _publish(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(events)
+            except Exception:
+                logger.exception("Event feed listener failed")
+        for sub in subscribers:
+            sub.put(events)
+        with self._published:
+            self._published.notify_all()
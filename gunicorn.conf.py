@@ -0,0 +1,41 @@
+"""
+Gunicorn settings for the WSGI serving mode (read automatically from the
+working directory; command-line flags from serve.py take precedence).
+
+MongoClient is not fork-safe, so nothing connects in the master: each
+worker connects in post_fork (in the background, so boot is not delayed)
+and the first webhook after a deploy finds a warm pool. On exit a worker
+flushes its pending events and then closes its storage connections.
+
+With PROMETHEUS_MULTIPROC_DIR set, the master empties it at startup and
+discards each finished worker's live gauges (see metrics.py).
+"""
+
+import os
+import sys
+
+from config import MONGO_WARMUP, STORAGE_BACKEND
+from metrics import MULTIPROC_DIR_ENV, mark_process_dead, prepare_multiproc_dir
+
+
+def on_starting(server):
+    if os.getenv(MULTIPROC_DIR_ENV):
+        prepare_multiproc_dir(os.environ[MULTIPROC_DIR_ENV])
+
+
+def post_fork(server, worker):
+    if MONGO_WARMUP and STORAGE_BACKEND == "mongo":
+        from db import start_warm_up
+        start_warm_up()
+
+
+def worker_exit(server, worker):
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        app_module.shutdown()
+    from storage import get_store
+    get_store().close()
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
@@ -0,0 +1,159 @@
+"""
+In-memory ring buffer of the most recent events ("hot tail").
+
+Almost every /api/events?after_id=... poll asks for "anything newer than
+what I saw a few seconds ago". The hot tail keeps the newest events of the
+collection in _id (insertion) order, fed by the per-process event feed, and
+answers those queries with a binary search instead of a MongoDB query.
+Cursors older than the buffer fall back to db.get_events, and so do cursors
+of the last few seconds: with several writer processes, events there may
+still arrive out of _id order (see event_feed.LookbackWindow).
+"""
+
+import bisect
+import threading
+
+from bson import ObjectId
+
+
+class HotTail:
+    """
+    Bounded, _id-ordered buffer of recent events.
+
+    Completeness invariant: once primed, the buffer holds every event with
+    _id > floor that the feed has seen, and the feed has seen every event
+    below its settled_id, so any floor <= after_id < settled_id can be
+    answered from memory (up to settled_id).
+
+    Args:
+        capacity (int): Max events kept; the oldest are evicted first.
+    """
+
+    def __init__(self, capacity=1000):
+        self._capacity = max(1, capacity)
+        self._ids = []      # _id strings, ascending (24-char hex sorts like ObjectId)
+        self._events = []   # event dicts, same order as _ids
+        self._floor = None  # after_id values >= floor are answerable
+        self._ready = False
+        self._attached = False
+        self._feed = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def prime(self, feed, fetch_recent):
+        """
+        Attach to the feed (first call only) and load the newest events.
+
+        The feed's high-water mark is fixed and the listener registered
+        before the snapshot is read, so events inserted meanwhile arrive via
+        the listener and nothing falls between the two.
+
+        Args:
+            feed (EventFeed): Source of new events.
+            fetch_recent (callable): fetch_recent(limit) -> newest events by
+                                     _id, ascending (db.get_recent_events).
+        """
+        feed.ensure_initialized()
+        if not self._attached:
+            feed.add_listener(self.on_events)
+            self._feed = feed
+            self._attached = True
+        recent = fetch_recent(self._capacity)
+        with self._lock:
+            self._merge_locked(recent)
+            if len(recent) < self._capacity:
+                self._floor = "0" * 24  # Whole collection is in memory
+            else:
+                self._floor = recent[0]["_id"]
+            self._evict_locked()
+            self._ready = True
+
+    def reset(self):
+        """
+        Drop every buffered event (after the collection was cleared). Until
+        prime() runs again, query_after() returns None so callers read from
+        the store.
+        """
+        with self._lock:
+            self._ids = []
+            self._events = []
+            self._floor = None
+            self._ready = False
+
+    def on_events(self, events):
+        """Feed listener: append a batch of new events (ascending _id)."""
+        with self._lock:
+            self._merge_locked(events)
+            if self._ready:
+                self._evict_locked()
+
+    def _merge_locked(self, events):
+        for event in events:
+            event_id = event["_id"]
+            if not self._ids or event_id > self._ids[-1]:
+                self._ids.append(event_id)
+                self._events.append(event)
+                continue
+            i = bisect.bisect_left(self._ids, event_id)
+            if i < len(self._ids) and self._ids[i] == event_id:
+                continue  # Already have it (snapshot and feed overlap)
+            self._ids.insert(i, event_id)
+            self._events.insert(i, event)
+
+    def _evict_locked(self):
+        excess = len(self._ids) - self._capacity
+        if excess > 0:
+            # The newest evicted id becomes the floor: everything above it remains
+            self._floor = self._ids[excess - 1]
+            del self._ids[:excess]
+            del self._events[:excess]
+
+    def query_after(self, after_id, limit):
+        """
+        Events inserted after after_id, like db.get_events(after_id=...).
+
+        Returns:
+            tuple or None: (events newest first by _id, latest_id), or
+                           None if the cursor is older than the buffer or
+                           not yet settled (or not a valid ObjectId) and
+                           MongoDB must be queried. Events from settled_id
+                           on are left for the next poll.
+        """
+        if not self._ready or not ObjectId.is_valid(after_id):
+            return None
+        after_id = after_id.lower()
+        settled = self._feed.settled_id
+        with self._lock:
+            if after_id < self._floor or (settled is not None and after_id >= settled):
+                self.misses += 1
+                return None
+            i = bisect.bisect_right(self._ids, after_id)
+            end = len(self._ids) if settled is None else bisect.bisect_left(self._ids, settled)
+            batch = self._events[i:min(i + limit, end)]
+            if not batch and end < len(self._ids):
+                # Only unsettled events are newer: an empty answer would
+                # have the client poll again straight away
+                self.misses += 1
+                return None
+            self.hits += 1
+        latest_id = batch[-1]["_id"] if batch else None
+        # Same order as get_events for after_id pages: insertion order, newest first
+        batch.reverse()
+        return batch, latest_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self._ready,
+                "size": len(self._ids),
+                "capacity": self._capacity,
+                "floor_id": self._floor,
+                "newest_id": self._ids[-1] if self._ids else None,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,119 @@
+"""
+Index provisioning for the events collection.
+
+Declares the indexes our query paths need, creates them idempotently in a
+background thread at startup (so a slow or unavailable MongoDB never delays
+boot), and reports missing / unused indexes for the admin endpoint.
+"""
+
+import threading
+import time
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from constants import EVENTS_COLLECTION
+from db import get_db
+from log import get_logger, kv
+
+logger = get_logger(__name__)
+
+# Indexes required by db.py query paths (name → purpose is in the comment)
+EVENT_INDEXES = [
+    # get_events initial load / since: sort by (timestamp, _id) newest first
+    IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id"),
+    # Lookups by commit hash / PR number
+    IndexModel([("request_id", ASCENDING)], name="request_id"),
+    # Idempotent ingestion: one document per X-GitHub-Delivery id. Partial,
+    # so legacy events without a delivery id are not affected.
+    IndexModel(
+        [("delivery_id", ASCENDING)],
+        name="delivery_id_unique",
+        unique=True,
+        partialFilterExpression={"delivery_id": {"$type": "string"}},
+    ),
+    # Filtered feeds (by author / by action), newest first
+    IndexModel([("author", ASCENDING), ("timestamp", DESCENDING)], name="author_timestamp"),
+    IndexModel([("action", ASCENDING), ("timestamp", DESCENDING)], name="action_timestamp"),
+]
+
+_provision_lock = threading.Lock()
+_provision_thread = None
+_last_result = {"status": "pending", "created": [], "error": None, "finished_at": None}
+
+
+def ensure_indexes():
+    """
+    Create every declared index that does not exist yet (idempotent).
+
+    Returns:
+        list: Names of indexes MongoDB reports for this call.
+    """
+    collection = get_db()[EVENTS_COLLECTION]
+    return collection.create_indexes(EVENT_INDEXES)
+
+
+def start_index_provisioning(retry_interval=10.0, max_attempts=30):
+    """
+    Run ensure_indexes() in a daemon thread, retrying while MongoDB is
+    unavailable. Safe to call more than once; only one thread runs per process.
+    """
+    global _provision_thread
+    with _provision_lock:
+        if _provision_thread is not None and _provision_thread.is_alive():
+            return
+        _provision_thread = threading.Thread(
+            target=_provision, args=(retry_interval, max_attempts),
+            name="index-provisioner", daemon=True,
+        )
+        _provision_thread.start()
+
+
+def _provision(retry_interval, max_attempts):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            created = ensure_indexes()
+            _last_result.update(status="ok", created=created, error=None, finished_at=time.time())
+            logger.info("Indexes ready", extra=kv(collection=EVENTS_COLLECTION, indexes=created))
+            return
+        except Exception as e:
+            _last_result.update(status="retrying", error=str(e))
+            logger.warning("Index provisioning failed", extra=kv(
+                attempt=attempt, max_attempts=max_attempts, error=str(e)))
+            time.sleep(retry_interval)
+    _last_result.update(status="failed", finished_at=time.time())
+
+
+def index_report():
+    """
+    Compare declared indexes with what exists on the collection.
+
+    Returns:
+        dict:
+            - provisioning: status of the background provisioning run
+            - missing: declared indexes that do not exist
+            - undeclared: existing indexes we do not declare (candidates to drop)
+            - unused: existing indexes with zero ops since the server tracked them
+            - usage: {name: {"ops": int, "since": datetime}} from $indexStats,
+                     or None if the server does not allow $indexStats
+    """
+    collection = get_db()[EVENTS_COLLECTION]
+    declared = [model.document["name"] for model in EVENT_INDEXES]
+    existing = [name for name in collection.index_information() if name != "_id_"]
+
+    try:
+        usage = {
+            stat["name"]: {"ops": stat["accesses"]["ops"], "since": stat["accesses"]["since"]}
+            for stat in collection.aggregate([{"$indexStats": {}}])
+        }
+    except OperationFailure:
+        usage = None
+
+    return {
+        "provisioning": dict(_last_result),
+        "declared": declared,
+        "missing": [name for name in declared if name not in existing],
+        "undeclared": [name for name in existing if name not in declared],
+        "unused": [name for name in existing if usage and usage.get(name, {}).get("ops") == 0],
+        "usage": usage,
+    }
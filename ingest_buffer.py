@@ -0,0 +1,219 @@
+"""
+In-process write-behind buffer for webhook events.
+
+The webhook route hands parsed events to the buffer and answers GitHub
+right away; a background thread flushes them to MongoDB in bulk
+(insert_many) once a batch fills up or the flush interval elapses.
+Pending events are flushed on shutdown.
+
+A batch the sink rejects is retried one event at a time, so a single
+document the database will never accept is logged and dropped instead
+of blocking every event queued behind it.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from log import get_logger, kv
+
+logger = get_logger(__name__)
+
+
+class EventBuffer:
+    """
+    Thread-safe write-behind queue that flushes events in batches.
+
+    Args:
+        sink (callable): Called with a list of events to store them
+                         (e.g. db.insert_events). Raises on failure.
+        batch_size (int): Flush as soon as this many events are pending.
+        flush_interval (float): Max seconds an event waits before a flush.
+        max_pending (int): Hard cap on queued events. When reached, add()
+                           refuses new events so the caller can fall back
+                           to a synchronous insert (backpressure).
+    """
+
+    def __init__(self, sink, batch_size=100, flush_interval=0.2, max_pending=10000):
+        self._sink = sink
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+
+        # Metrics (read via stats())
+        self._flushed_total = 0
+        self._flush_count = 0
+        self._flush_failures = 0
+        self._dropped_total = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def add(self, event):
+        """
+        Queue an event for the next flush.
+
+        Returns:
+            bool: True if queued, False if the buffer is full or closed
+                  (caller should store the event synchronously instead).
+        """
+        if self._closed:
+            return False
+        self._ensure_thread()
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                return False
+            self._pending.append(event)
+            depth = len(self._pending)
+        if depth >= self._batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """
+        Write all pending events to the sink, one batch at a time.
+
+        Returns:
+            int: Number of events written. When a batch fails, its events
+                 are retried one by one (see _write_singly); if none of
+                 them can be written either, the batch is put back at the
+                 front of the queue and the error is re-raised.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    batch = [self._pending.popleft()
+                             for _ in range(min(self._batch_size, len(self._pending)))]
+                start = time.perf_counter()
+                count = len(batch)
+                try:
+                    self._sink(batch)
+                except Exception:
+                    with self._lock:
+                        self._flush_failures += 1
+                    count, retry = (0, batch) if len(batch) == 1 else self._write_singly(batch)
+                    if retry:
+                        with self._lock:
+                            self._pending.extendleft(reversed(retry))
+                    if not count:
+                        raise
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self._flushed_total += count
+                    self._flush_count += 1
+                    self._last_flush_ms = elapsed_ms
+                    self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                    self._total_flush_ms += elapsed_ms
+                written += count
+        return written
+
+    def _write_singly(self, batch):
+        """
+        Write the events of a failed batch one at a time.
+
+        An event that fails while a later one is written is rejected by the
+        sink itself (not an outage): it is logged and dropped. Failures
+        after the last success are ambiguous (the database may have just
+        gone down) and are returned for a later retry.
+
+        Returns:
+            tuple: (number of events written, events to put back in the
+                   queue); (0, batch) if none could be written.
+        """
+        failed, last_written = [], -1
+        for i, event in enumerate(batch):
+            try:
+                self._sink([event])
+                last_written = i
+            except Exception as e:
+                failed.append((i, event, e))
+        if last_written < 0:
+            return 0, batch
+        dropped = [(event, e) for i, event, e in failed if i < last_written]
+        for event, e in dropped:
+            logger.error("Ingest buffer dropped an event the store rejects", extra=kv(
+                delivery_id=event.get("delivery_id"), action=event.get("action"), error=str(e)))
+        with self._lock:
+            self._dropped_total += len(dropped)
+        retry = [event for i, event, _ in failed if i > last_written]
+        return len(batch) - len(failed), retry
+
+    def close(self):
+        """Stop accepting events, stop the flusher thread and flush what is left."""
+        self._closed = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Ingest buffer final flush failed, events lost",
+                         extra=kv(lost=self.depth(), error=str(e)))
+
+    def depth(self):
+        """Number of events waiting to be flushed."""
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        """
+        Snapshot of buffer metrics.
+
+        Returns:
+            dict: queue_depth, flushed_total, flush_count, flush_failures,
+                  dropped_total (events the store rejected), last/max/avg
+                  flush latency in milliseconds.
+        """
+        with self._lock:
+            return {
+                "queue_depth": len(self._pending),
+                "flushed_total": self._flushed_total,
+                "flush_count": self._flush_count,
+                "flush_failures": self._flush_failures,
+                "dropped_total": self._dropped_total,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self._flush_count, 3)
+                                if self._flush_count else 0.0,
+            }
+
+    def _ensure_thread(self):
+        # Start the flusher lazily (and again after a fork: threads are not
+        # inherited by gunicorn workers forked from the master).
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name="ingest-buffer-flusher", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Ingest buffer flush failed, will retry", extra=kv(error=str(e)))
+                # Back off a little so a down database is not hammered
+                time.sleep(min(1.0, self._flush_interval * 5))
@@ -0,0 +1,62 @@
+"""
+Fast JSON provider for the Flask app.
+
+Webhook bodies (push payloads with hundreds of commits) and /api/events
+responses are the largest JSON we handle. This provider uses orjson when
+it is installed and falls back to Flask's stdlib-based provider otherwise,
+so request.get_json(), jsonify() and app.json.* all take the fast path.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: stdlib json is used instead
+    orjson = None
+
+try:
+    from bson import ObjectId
+except ImportError:
+    ObjectId = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider that delegates to orjson when available.
+
+    Output matches the stdlib provider for the types we serve: dates are
+    still rendered by Flask's default hook (HTTP date format), ObjectIds are
+    rendered as strings. Keys are not sorted on the fast path. Calls with
+    stdlib-only keyword arguments (indent, cls, ...) and pretty-printed
+    debug responses use the stdlib path.
+    """
+
+    #: True when the native (orjson) encoder/decoder is in use
+    native = orjson is not None
+
+    _options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    @staticmethod
+    def _default(o):
+        if ObjectId is not None and isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault("default", self._default)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self._default, option=self._options).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self._default,
+                            option=self._options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,384 @@
+"""
+Load-test harness: replays webhook deliveries and UI polls against the app
+and reports throughput, latency percentiles and error rates per endpoint.
+
+Usage:
+    python loadtest.py --in-process                      # app in this process
+    python loadtest.py --target http://127.0.0.1:5000    # running server
+    python loadtest.py --in-process --corpus deliveries.ndjson \\
+        --pattern poisson --rate 500 --duration 30 --concurrency 32
+
+Payloads come from --corpus NDJSON files (one {"event": ..., "payload": ...}
+object per line, or a bare GitHub payload whose event type is inferred;
+other lines are sent as an unsupported event) and/or synthetic push and
+pull_request deliveries (--synthetic, default when no corpus is given).
+
+--in-process drives app.py through Flask's test client. Events go to the
+in-memory storage engine by default, so only the HTTP layer is measured
+(--storage sqlite: a throwaway SQLite file; --storage mongomock: PyMongo
+code paths against mongomock; --storage mongo: MONGO_URI). Arrival patterns: closed (each worker sends
+back-to-back), constant, poisson and burst (open loop at --rate req/s;
+latency is measured from the scheduled send time, so queueing delay is
+included).
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+
+from payload_generator import PayloadGenerator
+from signature import SignatureVerifier
+
+ENDPOINT_WEBHOOK = "webhook"
+ENDPOINT_EVENTS = "events"
+
+
+# -----------------------------------------------------------------------------
+# Workload
+# -----------------------------------------------------------------------------
+def _infer_event(payload):
+    if "pull_request" in payload:
+        return "pull_request"
+    if "ref" in payload and "commits" in payload:
+        return "push"
+    return "issues"  # anything else exercises the unsupported-event path
+
+
+def load_corpus(paths):
+    """
+    Read deliveries from NDJSON files.
+
+    Returns:
+        list: (event type, body bytes) tuples.
+    """
+    deliveries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict) and "event" in record and "payload" in record:
+                    event, payload = record["event"], record["payload"]
+                else:
+                    event, payload = _infer_event(record if isinstance(record, dict) else {}), record
+                deliveries.append((event, json.dumps(payload).encode()))
+    return deliveries
+
+
+def synthetic_deliveries(seed=0, count=50):
+    """A seeded mix of push (1-20 commits) and pull_request deliveries (every action)."""
+    generator = PayloadGenerator(seed=seed, push_ratio=0.6, pull_request_ratio=0.4)
+    return [(event, json.dumps(payload).encode()) for event, payload in generator.deliveries(count)]
+
+
+class Workload:
+    """
+    Picks the next request: a webhook delivery (round-robin over the corpus,
+    fresh X-GitHub-Delivery id each time) or an /api/events poll that
+    follows the newest latest_id seen so far, like the UI does.
+    """
+
+    def __init__(self, deliveries, events_ratio, secret=None):
+        self._deliveries = deliveries
+        self._events_ratio = events_ratio
+        self._signer = SignatureVerifier(secret) if secret else None
+        self._next = 0
+        self._lock = threading.Lock()
+        self.latest_id = None
+
+    def next_request(self, rng):
+        """Returns (endpoint, method, path, headers, body)."""
+        if not self._deliveries or rng.random() < self._events_ratio:
+            path = "/api/events"
+            if self.latest_id:
+                path += "?after_id=" + self.latest_id
+            return ENDPOINT_EVENTS, "GET", path, {}, None
+        with self._lock:
+            event, body = self._deliveries[self._next % len(self._deliveries)]
+            self._next += 1
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+        }
+        if self._signer is not None:
+            headers["X-Hub-Signature-256"] = self._signer.sign(body)
+        return ENDPOINT_WEBHOOK, "POST", "/webhook", headers, body
+
+    def observe(self, endpoint, body):
+        if endpoint == ENDPOINT_EVENTS and body:
+            try:
+                latest = json.loads(body).get("latest_id")
+            except ValueError:
+                return
+            if latest and (self.latest_id is None or latest > self.latest_id):
+                self.latest_id = latest
+
+
+# -----------------------------------------------------------------------------
+# Transports
+# -----------------------------------------------------------------------------
+class HttpTransport:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, target):
+        url = urllib.parse.urlsplit(target)
+        self._cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self._host = url.netloc
+        self._local = threading.local()
+
+    def send(self, method, path, headers, body):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._cls(self._host, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+class InProcessTransport:
+    """Calls app.py through Flask's test client (one client per thread)."""
+
+    def __init__(self, storage):
+        if storage == "memory":
+            from memory_store import MemoryEventStore
+            from storage import use_store
+            use_store(MemoryEventStore())
+        elif storage == "sqlite":
+            from sqlite_store import SqliteEventStore
+            from storage import use_store
+            use_store(SqliteEventStore(os.path.join(tempfile.mkdtemp(), "events.db")))
+        elif storage == "mongomock":
+            import mongomock
+            import db
+            db.use_client(mongomock.MongoClient(tz_aware=True))
+        import app
+        self._app = app
+        self._local = threading.local()
+
+    def send(self, method, path, headers, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.app.test_client()
+        response = client.open(path, method=method, headers=headers, data=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        self._app.shutdown()
+
+
+# -----------------------------------------------------------------------------
+# Arrival patterns
+# -----------------------------------------------------------------------------
+def arrival_times(pattern, rate, burst_size, seed):
+    """
+    Infinite generator of send offsets (seconds from start) for open-loop
+    patterns.
+    """
+    rng = random.Random(seed)
+    t = 0.0
+    while True:
+        if pattern == "constant":
+            t += 1.0 / rate
+            yield t
+        elif pattern == "poisson":
+            t += rng.expovariate(rate)
+            yield t
+        elif pattern == "burst":
+            # burst_size requests at once, spaced so the mean rate is `rate`
+            t += burst_size / rate
+            for _ in range(burst_size):
+                yield t
+        else:
+            raise ValueError(f"unknown arrival pattern {pattern!r}")
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+class Results:
+    """Latency samples and status codes per endpoint (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            codes = self.statuses.setdefault(endpoint, {})
+            codes[status] = codes.get(status, 0) + 1
+            if status == "error" or status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run(transport, workload, args):
+    """
+    Drive the workload until --duration elapses or --requests are sent.
+
+    Returns:
+        tuple: (Results, elapsed seconds).
+    """
+    results = Results()
+    deadline = time.perf_counter() + args.duration
+    budget = [args.requests]
+    budget_lock = threading.Lock()
+    schedule = queue.Queue(maxsize=args.concurrency * 4)
+    start = time.perf_counter()
+
+    def take():
+        if args.requests <= 0:
+            return True
+        with budget_lock:
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            return True
+
+    def execute(rng, scheduled_at):
+        endpoint, method, path, headers, body = workload.next_request(rng)
+        try:
+            status, response_body = transport.send(method, path, headers, body)
+        except Exception:
+            status, response_body = "error", None
+        results.record(endpoint, time.perf_counter() - scheduled_at, status)
+        if status != "error":
+            workload.observe(endpoint, response_body)
+
+    def closed_worker(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline and take():
+            execute(rng, time.perf_counter())
+
+    def open_worker(seed):
+        rng = random.Random(seed)
+        while True:
+            scheduled_at = schedule.get()
+            if scheduled_at is None:
+                return
+            execute(rng, scheduled_at)
+
+    if args.pattern == "closed":
+        workers = [threading.Thread(target=closed_worker, args=(args.seed + i,))
+                   for i in range(args.concurrency)]
+        for w in workers:
+            w.start()
+    else:
+        workers = [threading.Thread(target=open_worker, args=(args.seed + i,))
+                   for i in range(args.concurrency)]
+        for w in workers:
+            w.start()
+        for offset in arrival_times(args.pattern, args.rate, args.burst_size, args.seed):
+            scheduled_at = start + offset
+            if scheduled_at >= deadline or not take():
+                break
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            schedule.put(scheduled_at)
+        for _ in workers:
+            schedule.put(None)
+    for w in workers:
+        w.join()
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed):
+    """
+    Per-endpoint summary.
+
+    Returns:
+        dict: endpoint -> requests, throughput, latency percentiles (ms),
+              error rate and status code counts.
+    """
+    summary = {}
+    for endpoint, samples in sorted(results.latencies.items()):
+        samples.sort()
+        count = len(samples)
+        summary[endpoint] = {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+            "error_rate": round(results.errors.get(endpoint, 0) / count, 4),
+            "statuses": {str(k): v for k, v in sorted(results.statuses[endpoint].items(), key=str)},
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay webhook deliveries and UI polls against the app")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="base URL of a running server, e.g. http://127.0.0.1:5000")
+    target.add_argument("--in-process", action="store_true", help="drive app.py via Flask's test client")
+    parser.add_argument("--storage", choices=("memory", "sqlite", "mongomock", "mongo"), default="memory",
+                        help="--in-process storage: in-memory engine (default), SQLite, mongomock or MONGO_URI")
+    parser.add_argument("--corpus", action="append", default=[], help="NDJSON deliveries (repeatable)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="add synthetic push/pull_request deliveries (default without --corpus)")
+    parser.add_argument("--events-ratio", type=float, default=0.5,
+                        help="fraction of requests that poll /api/events (default: 0.5)")
+    parser.add_argument("--secret", default="", help="sign deliveries (X-Hub-Signature-256)")
+    parser.add_argument("--pattern", choices=("closed", "constant", "poisson", "burst"), default="closed")
+    parser.add_argument("--rate", type=float, default=200.0, help="open-loop requests per second")
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds (default: 10)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after N requests (0 = no limit)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    deliveries = load_corpus(args.corpus)
+    if args.synthetic or not args.corpus:
+        deliveries += synthetic_deliveries(args.seed)
+    workload = Workload(deliveries, args.events_ratio, secret=args.secret or None)
+    transport = InProcessTransport(args.storage) if args.in_process else HttpTransport(args.target)
+
+    results, elapsed = run(transport, workload, args)
+    if args.in_process:
+        transport.close()
+    summary = report(results, elapsed)
+
+    if args.json:
+        print(json.dumps({"elapsed_s": round(elapsed, 3), "endpoints": summary}, indent=2))
+        return
+    print(f"{args.pattern} load, {args.concurrency} workers, {elapsed:.1f}s")
+    print(f"{'endpoint':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'errors':>8}")
+    for endpoint, s in summary.items():
+        print(f"{endpoint:<10} {s['requests']:>9} {s['throughput_rps']:>9.1f} {s['p50_ms']:>9.2f} "
+              f"{s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f} {s['error_rate']:>7.2%}")
+        print(f"{'':<10} statuses: {s['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
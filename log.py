@@ -0,0 +1,173 @@
+"""
+Structured, non-blocking logging.
+
+Request threads (and the event loop in ASGI mode) only put log records on
+an in-memory queue; a background QueueListener formats them as JSON lines
+(or plain text with LOG_FORMAT=text) and writes them to stdout, so a slow
+or unbuffered stdout never stalls the ingest path.
+
+Request-scoped fields (delivery id, event type, ...) are bound with
+start_request()/bind() and attached to every record logged while the
+request is handled. High-volume success logs are sampled: guard them with
+`if sampled():` so skipped ones cost one random() call.
+
+Usage:
+    from log import get_logger, kv
+    logger = get_logger(__name__)
+    logger.info("Stored event", extra=kv(action="PUSH", author="dev"))
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE
+
+# Fields bound to the current request (None outside a request)
+_request_fields = contextvars.ContextVar("log_request_fields", default=None)
+
+_ROOT = "webhook"
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Logger under the "webhook" namespace (configures logging on first use)."""
+    _configure()
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+def kv(**fields):
+    """`extra=` argument that adds structured fields to one record."""
+    return {"fields": fields}
+
+
+def sampled():
+    """True for LOG_SAMPLE_RATE of calls (guards per-event success logs)."""
+    return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+
+
+def start_request(**fields):
+    """Start a fresh set of request fields for the current thread / task."""
+    _request_fields.set(dict(fields))
+
+
+def bind(**fields):
+    """Add fields to the current request (no-op outside start_request)."""
+    current = _request_fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+def end_request():
+    """Forget the current request fields (threads are reused by the server)."""
+    _request_fields.set(None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request and record fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))}"
+                  f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        entry.update(getattr(record, "request", None) or {})
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development (LOG_FORMAT=text)."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extra = {**(getattr(record, "request", None) or {}), **(getattr(record, "fields", None) or {})}
+        if extra:
+            line += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records for the listener thread. Only the request fields are
+    captured here (they live in this thread's context); message formatting
+    happens on the listener. The listener is (re)started lazily per process,
+    since threads do not survive a fork.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self._target = target
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        record.request = _request_fields.get()
+        if record.request is not None:
+            record.request = dict(record.request)
+        if record.exc_info:
+            # Tracebacks cannot be formatted later (frames change); rare path
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        if self._listener is None:
+            self._target.handle(record)  # interpreter exit: write synchronously
+            return
+        self.queue.put_nowait(record)
+
+    def _start_listener(self):
+        with self._lock:
+            pid = os.getpid()
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                self.queue = queue.SimpleQueue()  # the parent's listener owns the old one
+            self._listener = logging.handlers.QueueListener(self.queue, self._target)
+            self._listener.start()
+            self._pid = pid
+            atexit.register(self._stop_listener, pid)
+
+    def _stop_listener(self, pid):
+        # Drains what is queued, then joins the listener thread
+        if self._pid == pid and self._listener is not None:
+            listener, self._listener = self._listener, None
+            listener.stop()
+
+
+def _configure():
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        root = logging.getLogger(_ROOT)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_QueueHandler(target))
+        root.propagate = False  # gunicorn / uvicorn loggers stay separate
+        _configured = True
@@ -0,0 +1,131 @@
+"""
+In-memory event storage engine (STORAGE_BACKEND=memory).
+
+Keeps events in a list ordered by insertion _id (ObjectIds generated
+in-process, so they only increase) plus a sorted (timestamp, _id) index
+for the newest-first initial load. Answers the same queries as db.py with
+the same result shape, so the HTTP layer can be load-tested or run as a
+single-node dev instance without MongoDB.
+
+Data lives in the process: it is lost on restart and not shared between
+gunicorn workers (run it with WEB_CONCURRENCY=1).
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from log import get_logger, kv, sampled
+from metrics import GET_EVENTS_SECONDS
+from query_planner import DISPLAY_FIELDS, plan_events, shape_event
+from storage import EventStore
+from utils import to_utc_datetime
+
+logger = get_logger(__name__)
+
+# Index key for events without a parseable timestamp (sorts oldest)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Sorts after every real _id (bisect past all events with a given timestamp)
+_MAX_ID = ObjectId("f" * 24)
+
+
+def _project(doc):
+    event = {"_id": doc["_id"]}
+    for field in DISPLAY_FIELDS:
+        if field in doc:
+            event[field] = doc[field]
+    return event
+
+
+class MemoryEventStore(EventStore):
+    """Thread-safe in-process event store (see module docstring)."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs = []          # documents, ascending _id
+        self._ids = []           # their _ids (bisect by cursor)
+        self._by_time = []       # sorted (timestamp, _id, document)
+        self._deliveries = {}    # delivery_id → _id (unique, like delivery_id_unique)
+
+    def _insert_locked(self, event_data):
+        delivery_id = event_data.get("delivery_id")
+        if isinstance(delivery_id, str) and delivery_id in self._deliveries:
+            return None
+        doc_id = event_data.setdefault("_id", ObjectId())
+        doc = dict(event_data)
+        if self._ids and doc_id < self._ids[-1]:
+            # Caller-supplied _id older than the tail: keep the list sorted
+            i = bisect_left(self._ids, doc_id)
+            self._ids.insert(i, doc_id)
+            self._docs.insert(i, doc)
+        else:
+            self._ids.append(doc_id)
+            self._docs.append(doc)
+        key = to_utc_datetime(doc.get("timestamp")) or _EPOCH
+        insort(self._by_time, (key, doc_id, doc))  # (key, _id) is unique
+        if isinstance(delivery_id, str):
+            self._deliveries[delivery_id] = doc_id
+        return doc_id
+
+    def insert_event(self, event_data):
+        with self._lock:
+            inserted_id = self._insert_locked(event_data)
+        if inserted_id is None:
+            logger.info("Duplicate delivery ignored", extra=kv(delivery_id=event_data.get("delivery_id")))
+        elif sampled():
+            logger.info("Stored event", extra=kv(action=event_data.get("action"),
+                                                  author=event_data.get("author")))
+        return inserted_id
+
+    def insert_events(self, events):
+        with self._lock:
+            inserted = [self._insert_locked(event) for event in events]
+        inserted_ids = [doc_id for doc_id in inserted if doc_id is not None]
+        if len(inserted_ids) < len(events):
+            logger.info("Skipped duplicate deliveries in batch",
+                        extra=kv(count=len(events) - len(inserted_ids)))
+        return inserted_ids
+
+    def get_events(self, since_timestamp=None, after_id=None, limit=100, before_id=None):
+        plan = plan_events(since_timestamp, after_id, before_id, limit)
+        with GET_EVENTS_SECONDS.labels(plan.mode).time():
+            with self._lock:
+                if plan.by_id and plan.ascending:
+                    start = bisect_right(self._ids, plan.after) if plan.after is not None else 0
+                    docs = self._docs[start:start + plan.limit]
+                elif plan.by_id:
+                    stop = bisect_left(self._ids, plan.before) if plan.before is not None else len(self._ids)
+                    docs = self._docs[max(0, stop - plan.limit):stop][::-1]
+                else:
+                    stop = len(self._by_time)
+                    first = bisect_right(self._by_time, (plan.since, _MAX_ID)) if plan.since else 0
+                    docs = [entry[2] for entry in
+                            reversed(self._by_time[max(first, stop - plan.limit):stop])]
+                events = [_project(doc) for doc in docs]
+        return plan.finish(events)
+
+    def get_latest_id(self):
+        with self._lock:
+            return str(self._ids[-1]) if self._ids else None
+
+    def get_recent_events(self, limit=1000):
+        with self._lock:
+            events = [_project(doc) for doc in self._docs[-limit:]] if limit > 0 else []
+        return [shape_event(event) for event in events]
+
+    def delete_all_events(self):
+        with self._lock:
+            deleted = len(self._docs)
+            self._docs, self._ids, self._by_time = [], [], []
+            self._deliveries.clear()
+            self.generation += 1
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.name, "events": len(self._docs)}
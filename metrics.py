@@ -0,0 +1,186 @@
+"""
+Prometheus metrics for the webhook receiver (served on GET /metrics).
+
+Covers the /webhook pipeline stage by stage, get_events by query mode, the
+/api/events answer source and the MongoDB connection pool (fed by a PyMongo
+ConnectionPoolListener).
+
+Multiple worker processes: set PROMETHEUS_MULTIPROC_DIR (serve.py does it
+when WEB_CONCURRENCY > 1) and every worker writes its samples there;
+/metrics then aggregates all workers, whichever one answers the scrape.
+"""
+
+import glob
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Sub-millisecond (HMAC, hot-tail reads) up to slow MongoDB round trips
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+# X-GitHub-Event is client-controlled; keep label values bounded
+_EVENT_LABELS = {"push", "pull_request", "ping"}
+
+WEBHOOK_REQUESTS = Counter(
+    "webhook_requests_total",
+    "Webhook deliveries by event type and HTTP status",
+    ["event", "status"],
+)
+WEBHOOK_STAGE_SECONDS = Histogram(
+    "webhook_stage_seconds",
+    "Time spent in each /webhook stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+GET_EVENTS_SECONDS = Histogram(
+    "get_events_seconds",
+    "db.get_events latency by query mode",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+API_EVENTS_RESPONSES = Counter(
+    "api_events_responses_total",
+    "/api/events answers by query mode and source",
+    ["mode", "source"],
+)
+MONGO_INSERT_SECONDS = Histogram(
+    "mongo_insert_seconds",
+    "Event insert round trips (insert_one / insert_many)",
+    ["op"],
+    buckets=LATENCY_BUCKETS,
+)
+POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections",
+    "Open MongoDB pool connections",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out",
+    "MongoDB connections currently checked out",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "mongo_pool_checkout_wait_seconds",
+    "Time to check a connection out of the pool",
+    buckets=LATENCY_BUCKETS,
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total",
+    "Connection checkouts that failed",
+    ["reason"],
+)
+POOL_CLEARED = Counter(
+    "mongo_pool_cleared_total",
+    "Times a MongoDB pool was cleared (server marked unknown)",
+)
+
+# Children resolved once, so the hot path skips the labels() lookup
+STAGE_SIGNATURE = WEBHOOK_STAGE_SECONDS.labels("signature")
+STAGE_SELECTIVE_PARSE = WEBHOOK_STAGE_SECONDS.labels("selective_parse")
+STAGE_DECODE = WEBHOOK_STAGE_SECONDS.labels("json_decode")
+STAGE_PARSE = WEBHOOK_STAGE_SECONDS.labels("parse")
+STAGE_STORE = WEBHOOK_STAGE_SECONDS.labels("store")
+INSERT_ONE = MONGO_INSERT_SECONDS.labels("insert_one")
+INSERT_MANY = MONGO_INSERT_SECONDS.labels("insert_many")
+
+
+def event_label(event_type):
+    """Label value for an X-GitHub-Event header (unknown types become "other")."""
+    return event_type if event_type in _EVENT_LABELS else "other"
+
+
+def query_mode(since_timestamp=None, after_id=None, before_id=None):
+    """get_events query mode label: "after_id", "before_id", "since" or "initial"."""
+    if after_id:
+        return "after_id"
+    if before_id:
+        return "before_id"
+    return "since" if since_timestamp else "initial"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Feeds the mongo_pool_* metrics from PyMongo connection pool events."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        POOL_CLEARED.inc()
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        POOL_CHECKED_OUT.inc()
+        # PyMongo 4.11+ reports how long the checkout waited
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            POOL_CHECKOUT_WAIT_SECONDS.observe(duration)
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.dec()
+
+
+def prepare_multiproc_dir(directory):
+    """
+    Create (or empty) the multiprocess metrics directory before workers
+    start, so samples from a previous run are not aggregated again.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def mark_process_dead(pid):
+    """Drop a finished worker's live gauges (gunicorn child_exit hook)."""
+    if os.getenv(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+def render():
+    """
+    Current metrics in the Prometheus text format, aggregated across worker
+    processes when PROMETHEUS_MULTIPROC_DIR is set.
+
+    Returns:
+        tuple: (body bytes, content type).
+    """
+    registry = REGISTRY
+    if os.getenv(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,85 @@
+"""
+One-off migration: convert string timestamps to native BSON datetimes.
+
+Events stored before timestamps became datetimes have
+"timestamp": "YYYY-MM-DD HH:MM:SS UTC". This rewrites them in bulk
+batches (one bulk_write per batch, walking the collection by _id), so it
+can run against a live database and be re-run safely: only documents that
+still hold a string timestamp are touched.
+
+Usage:
+    python migrate_timestamps.py              # migrate everything
+    python migrate_timestamps.py --dry-run    # count what would change
+    python migrate_timestamps.py --batch-size 5000
+"""
+
+import argparse
+
+from pymongo import UpdateOne
+
+from db import get_events_collection
+from utils import to_utc_datetime
+
+_STRING_TIMESTAMP = {"timestamp": {"$type": "string"}}
+
+
+def migrate(batch_size=1000, dry_run=False):
+    """
+    Convert string timestamps to datetimes.
+
+    Args:
+        batch_size (int): Documents per bulk_write.
+        dry_run (bool): Only count documents, do not write.
+
+    Returns:
+        dict: scanned, converted and unparseable document counts.
+    """
+    collection = get_events_collection()
+    counts = {"scanned": 0, "converted": 0, "unparseable": 0}
+    last_id = None
+
+    while True:
+        query = dict(_STRING_TIMESTAMP)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(
+            collection.find(query, {"timestamp": 1}).sort("_id", 1).limit(batch_size)
+        )
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        ops = []
+        for doc in batch:
+            dt = to_utc_datetime(doc["timestamp"])
+            if dt is None:
+                counts["unparseable"] += 1
+                continue
+            # Match on the old value so a concurrent write is never overwritten
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "timestamp": doc["timestamp"]},
+                {"$set": {"timestamp": dt}},
+            ))
+        counts["scanned"] += len(batch)
+        if ops and not dry_run:
+            counts["converted"] += collection.bulk_write(ops, ordered=False).modified_count
+        elif dry_run:
+            counts["converted"] += len(ops)
+        print(f"… {counts['scanned']} scanned, {counts['converted']} converted")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert string event timestamps to BSON dates")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    counts = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+    prefix = "Would convert" if args.dry_run else "Converted"
+    print(f"✅ {prefix} {counts['converted']} of {counts['scanned']} event(s); "
+          f"{counts['unparseable']} unparseable (left as-is)")
+
+
+if __name__ == "__main__":
+    main()
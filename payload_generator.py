@@ -0,0 +1,329 @@
+"""
+Deterministic synthetic GitHub deliveries for scale and parser testing.
+
+Generates push (N commits with file lists), pull_request (every action,
+merged or not) and unsupported events with controllable author / branch
+cardinality and timestamp skew, plus optional edge cases (branch deletion,
+tag pushes, unicode names, nested keys that shadow top-level ones). The
+same seed always yields the same deliveries.
+
+Usage:
+    python payload_generator.py --count 100000 --out deliveries.ndjson
+    python payload_generator.py --count 10000000 --load-mongo --batch-size 5000
+    python payload_generator.py --count 1000 --edge-ratio 0.2 | head
+
+NDJSON lines are {"event", "delivery_id", "payload"} objects, the corpus
+format loadtest.py replays. --load-mongo parses each delivery the way
+/webhook does and bulk-inserts the resulting event documents (MONGO_URI).
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# pull_request actions GitHub sends (only opened / closed are stored)
+PULL_REQUEST_ACTIONS = (
+    "opened", "closed", "reopened", "synchronize", "edited", "labeled", "unlabeled",
+    "assigned", "unassigned", "review_requested", "review_request_removed",
+    "ready_for_review", "converted_to_draft",
+)
+
+# Event types parse_github_webhook ignores
+UNSUPPORTED_EVENTS = ("issues", "issue_comment", "star", "create", "delete", "release",
+                      "workflow_run", "check_suite", "status")
+
+_OFFSETS = ("+00:00", "+05:30", "-07:00", "+09:00", "Z")
+
+
+# -----------------------------------------------------------------------------
+# Payload builders (shaped like real GitHub deliveries)
+# -----------------------------------------------------------------------------
+def _sha(value):
+    return hashlib.sha1(str(value).encode()).hexdigest()
+
+
+def _make_commit(i, files_per_commit, author="dev", timestamp=None, salt=""):
+    sha = _sha(f"{salt}{i}")
+    person = {"name": author, "email": f"{author}@example.com", "username": author}
+    return {
+        "id": sha,
+        "tree_id": _sha(sha),
+        "distinct": True,
+        "message": f"Commit {i}: update service modules and tests",
+        "timestamp": timestamp or "2026-01-15T10:%02d:00+05:30" % (i % 60),
+        "url": f"https://github.com/acme/action-repo/commit/{sha}",
+        "author": person,
+        "committer": person,
+        "added": [f"src/module_{i}_{j}.py" for j in range(files_per_commit)],
+        "removed": [],
+        "modified": [f"tests/test_module_{i}_{j}.py" for j in range(files_per_commit)],
+    }
+
+
+def make_push_payload(n_commits, files_per_commit=10, author="dev", branch="staging",
+                      timestamp=None, salt=""):
+    """
+    Push payload with n_commits commits (GitHub sends at most 20 in full).
+
+    Args:
+        n_commits (int): Commits in commits[]; the last is head_commit.
+        files_per_commit (int): Added and modified paths per commit.
+        author (str): Pusher / commit author name.
+        branch (str): Branch name (ref is refs/heads/<branch>).
+        timestamp (str, optional): head_commit timestamp (ISO 8601).
+        salt (str): Makes commit hashes unique across payloads.
+    """
+    commits = [_make_commit(i, files_per_commit, author, salt=salt) for i in range(n_commits)]
+    if commits and timestamp:
+        commits[-1]["timestamp"] = timestamp
+    return {
+        "ref": f"refs/heads/{branch}",
+        "before": "0" * 40,
+        "after": commits[-1]["id"] if commits else "0" * 40,
+        "repository": {"id": 1, "name": "action-repo", "full_name": "acme/action-repo",
+                       "private": False, "owner": {"login": "acme", "id": 2}},
+        "pusher": {"name": author, "email": f"{author}@example.com"},
+        "sender": {"login": author, "id": 3},
+        "created": False,
+        "deleted": False,
+        "forced": False,
+        "compare": "https://github.com/acme/action-repo/compare/a...b",
+        "commits": commits,
+        "head_commit": commits[-1] if commits else None,
+    }
+
+
+def make_pull_request_payload(number=42, action="opened", merged=False, author="dev",
+                              head="feature", base="main", updated_at="2026-01-15T10:05:00Z"):
+    """pull_request payload with the nested repo/user objects GitHub sends."""
+    user = {"login": author, "id": 3, "type": "User", "site_admin": False,
+            "avatar_url": "https://avatars.githubusercontent.com/u/3",
+            "html_url": f"https://github.com/{author}"}
+    repo = {"id": 1, "name": "action-repo", "full_name": "acme/action-repo",
+            "private": False, "owner": user, "description": "Sample repo",
+            "default_branch": "main", **{f"{k}_url": f"https://api.github.com/{k}"
+                                         for k in ("issues", "pulls", "commits", "branches",
+                                                   "tags", "labels", "releases", "hooks")}}
+    return {
+        "action": action,
+        "number": number,
+        "pull_request": {
+            "number": number,
+            "state": "closed" if action == "closed" else "open",
+            "title": "Add feature",
+            "body": "Implements the feature.\n" * 20,
+            "user": user,
+            "merged": merged,
+            "created_at": "2026-01-15T10:00:00Z",
+            "updated_at": updated_at,
+            "head": {"ref": head, "sha": "a" * 40, "user": user, "repo": repo},
+            "base": {"ref": base, "sha": "b" * 40, "user": user, "repo": repo},
+            "labels": [{"id": i, "name": f"label-{i}"} for i in range(5)],
+            "commits": 3, "additions": 120, "deletions": 30, "changed_files": 7,
+        },
+        "repository": repo,
+        "sender": user,
+    }
+
+
+def make_unsupported_payload(event, author="dev"):
+    """Minimal payload for an event type the receiver ignores."""
+    return {
+        "action": "created",
+        "sender": {"login": author, "id": 3},
+        "repository": {"id": 1, "name": "action-repo", "full_name": "acme/action-repo"},
+        event: {"id": 1, "url": f"https://api.github.com/{event}/1"},
+    }
+
+
+# -----------------------------------------------------------------------------
+# Generator
+# -----------------------------------------------------------------------------
+class PayloadGenerator:
+    """
+    Seeded stream of (event type, payload) deliveries.
+
+    Args:
+        seed (int): Same seed, same deliveries.
+        authors (int): Distinct author names (cardinality).
+        branches (int): Distinct branch names.
+        push_ratio (float): Share of push deliveries.
+        pull_request_ratio (float): Share of pull_request deliveries; the
+                                    rest are unsupported events.
+        max_commits (int): Commits per push are drawn from 1..max_commits.
+        files_per_commit (int): Added / modified paths per commit.
+        start (datetime): Timestamp of the first delivery (UTC).
+        interval (float): Mean seconds between deliveries.
+        skew (float): Max seconds a payload timestamp deviates from its
+                      arrival slot (out-of-order GitHub timestamps).
+        edge_ratio (float): Share of pathological payloads.
+    """
+
+    def __init__(self, seed=0, authors=50, branches=20, push_ratio=0.6, pull_request_ratio=0.3,
+                 max_commits=20, files_per_commit=10, start=None, interval=1.0, skew=0.0,
+                 edge_ratio=0.0):
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._authors = [f"dev{i:04d}" for i in range(max(1, authors))]
+        self._branches = ["main"] + [f"feature-{i:04d}" for i in range(max(1, branches) - 1)]
+        self._push_ratio = push_ratio
+        self._pull_request_ratio = pull_request_ratio
+        self._max_commits = max(1, max_commits)
+        self._files = files_per_commit
+        self._start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._interval = interval
+        self._skew = skew
+        self._edge_ratio = edge_ratio
+
+    def _timestamp(self, i):
+        rng = self._rng
+        when = self._start + timedelta(seconds=i * self._interval + rng.uniform(-self._skew, self._skew))
+        offset = rng.choice(_OFFSETS)
+        if offset == "Z":
+            return when.strftime("%Y-%m-%dT%H:%M:%SZ")
+        sign = 1 if offset[0] == "+" else -1
+        delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6])) * sign
+        return (when + delta).strftime("%Y-%m-%dT%H:%M:%S") + offset
+
+    def delivery(self, i):
+        """The i-th delivery: (event type, payload dict)."""
+        rng = self._rng
+        author = rng.choice(self._authors)
+        branch = rng.choice(self._branches)
+        timestamp = self._timestamp(i)
+        if rng.random() < self._edge_ratio:
+            return self._edge_case(i, author, branch, timestamp)
+        roll = rng.random()
+        if roll < self._push_ratio:
+            payload = make_push_payload(rng.randint(1, self._max_commits), self._files,
+                                        author=author, branch=branch, timestamp=timestamp,
+                                        salt=f"{self._seed}:{i}:")
+            return "push", payload
+        if roll < self._push_ratio + self._pull_request_ratio:
+            action = rng.choice(PULL_REQUEST_ACTIONS)
+            merged = action == "closed" and rng.random() < 0.7
+            base = "main" if branch != "main" else rng.choice(self._branches)
+            return "pull_request", make_pull_request_payload(
+                number=i + 1, action=action, merged=merged, author=author,
+                head=branch, base=base, updated_at=timestamp,
+            )
+        event = rng.choice(UNSUPPORTED_EVENTS)
+        return event, make_unsupported_payload(event, author)
+
+    def _edge_case(self, i, author, branch, timestamp):
+        rng = self._rng
+        kind = rng.randrange(6)
+        payload = make_push_payload(rng.randint(1, 3), 2, author=author, branch=branch,
+                                    timestamp=timestamp, salt=f"{self._seed}:{i}:")
+        if kind == 0:    # branch deletion: no head_commit, zero "after"
+            payload.update(deleted=True, head_commit=None, commits=[], after="0" * 40)
+        elif kind == 1:  # tag push
+            payload["ref"] = f"refs/tags/v{i}.0.0"
+        elif kind == 2:  # unicode author and branch names
+            name = "dévéloppeur-日本-" + author
+            payload["pusher"]["name"] = name
+            payload["ref"] = f"refs/heads/feature/ünïcødé-{i}"
+        elif kind == 3:  # top-level keys repeated inside nested objects
+            payload["repository"]["ref"] = "refs/heads/shadow"
+            payload["repository"]["pusher"] = {"name": "shadow"}
+        elif kind == 4:  # missing / malformed timestamp
+            payload["head_commit"]["timestamp"] = rng.choice(("", "not-a-date", None))
+        else:            # huge file lists
+            for commit in payload["commits"]:
+                commit["modified"] = [f"src/pkg_{j // 100}/file_{j}.py" for j in range(2000)]
+        return "push", payload
+
+    def delivery_id(self, i):
+        """X-GitHub-Delivery id of the i-th delivery (stable per seed, distinct across seeds)."""
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{self._seed}-{i}"))
+
+    def deliveries(self, count):
+        """Yield count (event type, payload) deliveries."""
+        for i in range(count):
+            yield self.delivery(i)
+
+
+# -----------------------------------------------------------------------------
+# Output
+# -----------------------------------------------------------------------------
+def write_ndjson(generator, count, out):
+    """Write deliveries as {"event", "delivery_id", "payload"} lines."""
+    for i, (event, payload) in enumerate(generator.deliveries(count)):
+        out.write(json.dumps({"event": event, "delivery_id": generator.delivery_id(i),
+                              "payload": payload}, ensure_ascii=False))
+        out.write("\n")
+
+
+def load_mongo(generator, count, batch_size=5000):
+    """
+    Parse deliveries like /webhook and bulk-insert the stored ones.
+
+    Returns:
+        int: Event documents inserted.
+    """
+    from db import insert_events
+    from webhook_parser import parse_github_webhook
+
+    inserted, batch = 0, []
+    start = time.perf_counter()
+    for i, (event, payload) in enumerate(generator.deliveries(count)):
+        doc = parse_github_webhook(payload, event)
+        if not doc:
+            continue
+        doc["delivery_id"] = generator.delivery_id(i)
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            inserted += len(insert_events(batch))
+            batch = []
+            rate = inserted / (time.perf_counter() - start)
+            print(f"… {inserted} inserted ({rate:,.0f} docs/s)", file=sys.stderr)
+    if batch:
+        inserted += len(insert_events(batch))
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic GitHub webhook deliveries")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--authors", type=int, default=50, help="distinct authors")
+    parser.add_argument("--branches", type=int, default=20, help="distinct branches")
+    parser.add_argument("--push-ratio", type=float, default=0.6)
+    parser.add_argument("--pull-request-ratio", type=float, default=0.3,
+                        help="the remainder are unsupported events")
+    parser.add_argument("--max-commits", type=int, default=20)
+    parser.add_argument("--files", type=int, default=10, help="added/modified files per commit")
+    parser.add_argument("--start", default="2026-01-01T00:00:00+00:00", help="first timestamp (ISO 8601)")
+    parser.add_argument("--interval", type=float, default=1.0, help="mean seconds between deliveries")
+    parser.add_argument("--skew", type=float, default=0.0, help="max timestamp skew in seconds")
+    parser.add_argument("--edge-ratio", type=float, default=0.0, help="share of pathological payloads")
+    parser.add_argument("--out", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--load-mongo", action="store_true", help="bulk-insert into MongoDB instead")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    generator = PayloadGenerator(
+        seed=args.seed, authors=args.authors, branches=args.branches,
+        push_ratio=args.push_ratio, pull_request_ratio=args.pull_request_ratio,
+        max_commits=args.max_commits, files_per_commit=args.files,
+        start=datetime.fromisoformat(args.start), interval=args.interval,
+        skew=args.skew, edge_ratio=args.edge_ratio,
+    )
+    if args.load_mongo:
+        inserted = load_mongo(generator, args.count, args.batch_size)
+        print(f"✅ Inserted {inserted} event(s) from {args.count} deliveries", file=sys.stderr)
+        return
+    if args.out == "-":
+        write_ndjson(generator, args.count, sys.stdout)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            write_ndjson(generator, args.count, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Query planning for get_events (shared by every storage backend).
+
+plan_events() turns the /api/events parameters into an EventsQuery that
+names one index-backed ordering and a scan direction:
+
+  - after_id:  _id > cursor, ascending _id (the _id index), limit N.
+               Polls never skip events: the page is the N oldest unseen.
+  - before_id: _id < cursor, descending _id, limit N (older pages).
+  - since:     timestamp > since, (timestamp, _id) descending (legacy).
+  - initial:   newest first by (timestamp, _id) (timestamp_id index).
+
+Only the displayed fields are read (PROJECTION). EventsQuery.finish()
+turns the documents, in scan order, into the API result: events newest
+first (keyset pages come back in _id order, so that is a reversal, not a
+sort) and latest_id taken from the end of the cursor, or tracked during
+the same pass that formats ids and timestamps.
+"""
+
+from bson import ObjectId
+
+from utils import format_utc, to_utc_datetime
+
+# Fields the API / UI use; everything else stays in the database
+DISPLAY_FIELDS = ("request_id", "author", "action", "from_branch", "to_branch", "timestamp")
+
+# find() projection for DISPLAY_FIELDS (_id is always returned)
+PROJECTION = {field: 1 for field in DISPLAY_FIELDS}
+
+MODE_AFTER_ID = "after_id"
+MODE_BEFORE_ID = "before_id"
+MODE_SINCE = "since"
+MODE_INITIAL = "initial"
+
+
+def _object_id(value):
+    """ObjectId for a cursor string, or None if it is missing / malformed."""
+    if value and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+class EventsQuery:
+    """
+    One planned get_events query.
+
+    Attributes:
+        mode (str): after_id, before_id, since or initial (metrics label).
+        by_id (bool): Ordered by _id (keyset page) rather than timestamp.
+        ascending (bool): Scan direction of that ordering.
+        after (ObjectId): Lower _id bound (exclusive), or None.
+        before (ObjectId): Upper _id bound (exclusive), or None.
+        since (datetime): Lower timestamp bound (exclusive), or None.
+        limit (int): Max documents to read.
+    """
+
+    def __init__(self, mode, by_id, ascending, limit, after=None, before=None, since=None):
+        self.mode = mode
+        self.by_id = by_id
+        self.ascending = ascending
+        self.limit = limit
+        self.after = after
+        self.before = before
+        self.since = since
+
+    def mongo_filter(self):
+        """find() filter for this plan."""
+        if self.by_id:
+            bounds = {}
+            if self.after is not None:
+                bounds["$gt"] = self.after
+            if self.before is not None:
+                bounds["$lt"] = self.before
+            return {"_id": bounds} if bounds else {}
+        return {"timestamp": {"$gt": self.since}} if self.since is not None else {}
+
+    def mongo_sort(self):
+        """find() sort for this plan (matches the _id / timestamp_id indexes)."""
+        direction = 1 if self.ascending else -1
+        if self.by_id:
+            return [("_id", direction)]
+        return [("timestamp", direction), ("_id", direction)]
+
+    def finish(self, docs):
+        """
+        Shape documents read in scan order into the get_events result.
+
+        Args:
+            docs (list[dict]): Documents in this plan's scan order (modified
+                               in place: _id / timestamp become strings).
+
+        Returns:
+            tuple: (events newest first, latest_id str or None). latest_id
+                   is the largest _id in the page (next after_id cursor).
+        """
+        if self.ascending:
+            docs.reverse()
+        if self.by_id:
+            for doc in docs:
+                shape_event(doc)
+            return docs, docs[0]["_id"] if docs else None
+        # Timestamp order: the newest _id can be anywhere in the page
+        latest = None
+        for doc in docs:
+            if latest is None or doc["_id"] > latest:
+                latest = doc["_id"]
+            shape_event(doc)
+        return docs, str(latest) if latest is not None else None
+
+
+def plan_events(since_timestamp=None, after_id=None, before_id=None, limit=100):
+    """
+    Plan a get_events query; see the module docstring for the orderings.
+
+    A malformed after_id reads from the start of the collection, a
+    malformed before_id from the newest event (as if it were absent).
+
+    Returns:
+        EventsQuery
+    """
+    limit = max(0, int(limit))
+    if after_id:
+        return EventsQuery(MODE_AFTER_ID, True, True, limit, after=_object_id(after_id))
+    if before_id:
+        return EventsQuery(MODE_BEFORE_ID, True, False, limit, before=_object_id(before_id))
+    since = to_utc_datetime(since_timestamp)
+    if since is not None:
+        return EventsQuery(MODE_SINCE, False, False, limit, since=since)
+    return EventsQuery(MODE_INITIAL, False, False, limit)
+
+
+def shape_event(doc):
+    """Make one stored event JSON-friendly in place (_id and timestamp as strings)."""
+    doc["_id"] = str(doc["_id"])
+    doc["timestamp"] = format_utc(doc.get("timestamp"))
+    return doc
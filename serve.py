@@ -0,0 +1,50 @@
+"""
+Production entry point: start the configured server (Procfile: python serve.py).
+
+SERVER_MODE=wsgi (default) runs app.py under gunicorn with threaded workers;
+SERVER_MODE=asgi runs asgi_app.py under uvicorn, where long-polls and SSE
+streams are coroutines instead of threads. Both bind 0.0.0.0:$PORT.
+"""
+
+import os
+import tempfile
+
+from config import SERVER_MODE, WEB_CONCURRENCY, WEB_THREADS
+from metrics import MULTIPROC_DIR_ENV, prepare_multiproc_dir
+
+
+def build_command(mode, port, workers, threads=WEB_THREADS):
+    """
+    Server command line for a serving mode.
+
+    Args:
+        mode (str): "wsgi" or "asgi".
+        port (str): Port to bind.
+        workers (int): Worker processes.
+        threads (int): Threads per worker (wsgi only).
+
+    Returns:
+        list: argv for os.execvp.
+    """
+    if mode == "asgi":
+        return ["uvicorn", "asgi_app:app", "--host", "0.0.0.0", "--port", port,
+                "--workers", str(workers)]
+    if mode == "wsgi":
+        return ["gunicorn", "app:app", "--bind", f"0.0.0.0:{port}",
+                "--workers", str(workers), "--worker-class", "gthread", "--threads", str(threads)]
+    raise SystemExit(f"❌ Unknown SERVER_MODE '{mode}' (expected 'wsgi' or 'asgi')")
+
+
+def main():
+    if WEB_CONCURRENCY > 1:
+        # Workers share metrics through files so /metrics covers all of them
+        os.environ.setdefault(MULTIPROC_DIR_ENV, os.path.join(tempfile.gettempdir(), "webhook-metrics"))
+    if os.getenv(MULTIPROC_DIR_ENV):
+        prepare_multiproc_dir(os.environ[MULTIPROC_DIR_ENV])
+    argv = build_command(SERVER_MODE, os.getenv("PORT", "5000"), WEB_CONCURRENCY)
+    print(f"🚀 Starting {SERVER_MODE} server: {' '.join(argv)}")
+    os.execvp(argv[0], argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+GitHub webhook signature verification (X-Hub-Signature-256).
+
+GitHub signs the raw request body with HMAC-SHA256 using the webhook
+secret. We verify those raw bytes before any JSON parsing, so forged or
+junk payloads are rejected without paying to decode them.
+"""
+
+import hashlib
+import hmac
+
+SIGNATURE_PREFIX = "sha256="
+
+
+class SignatureVerifier:
+    """
+    Verifies X-Hub-Signature-256 against a shared secret.
+
+    The keyed HMAC object (key padding and inner/outer pads) is built once;
+    each request only copies it and hashes the body.
+
+    Args:
+        secret (str): GitHub webhook secret. Empty disables verification.
+    """
+
+    def __init__(self, secret):
+        self._base = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256) if secret else None
+
+    @property
+    def enabled(self):
+        """True if a secret is configured."""
+        return self._base is not None
+
+    def sign(self, body):
+        """Return the X-Hub-Signature-256 header value for body (bytes)."""
+        mac = self._base.copy()
+        mac.update(body)
+        return SIGNATURE_PREFIX + mac.hexdigest()
+
+    def verify(self, body, signature_header):
+        """
+        Check a signature header against the raw request body.
+
+        Args:
+            body (bytes): Raw request body, exactly as received.
+            signature_header (str): X-Hub-Signature-256 value ("sha256=<hex>").
+
+        Returns:
+            bool: True if the signature matches (constant-time comparison).
+        """
+        if not signature_header or not signature_header.startswith(SIGNATURE_PREFIX):
+            return False
+        try:
+            expected = bytes.fromhex(signature_header[len(SIGNATURE_PREFIX):])
+        except ValueError:
+            return False
+        mac = self._base.copy()
+        mac.update(body)
+        return hmac.compare_digest(mac.digest(), expected)
@@ -0,0 +1,444 @@
+"""
+Durable on-disk spool (write-ahead log) for webhook events.
+
+When SPOOL_DIR is set, /webhook appends each parsed event to a local
+segment file and acks GitHub once the record is fsync'd; a background
+drainer replays finished segments into MongoDB in bulk and deletes them.
+MongoDB being slow or failing over then no longer affects ack latency and
+no event is lost while it is unavailable.
+
+Segment layout:
+  - Files are named "<pid>-<created_ms>-<seq>.open" while being written, renamed to
+    ".seg" when full (or idle), and to ".seg.drain" while a drainer
+    replays them. Renames are atomic, so several gunicorn workers can share
+    one spool directory and each segment is drained exactly once.
+  - The writer and the drainer hold an exclusive flock on the file they
+    own. Locks die with their process, so any ".open" or ".seg.drain" file
+    whose lock can be taken was left by a crashed or exited process and is
+    put back in the ".seg" queue (pids are not used: a restarted container
+    reuses them).
+  - Each record is: 4-byte length + 4-byte CRC32 (little endian) + BSON
+    document. Replay stops at the first torn or corrupt record.
+  - A segment the sink keeps rejecting while other segments drain fine
+    (a poison document rather than a database outage) is renamed to
+    ".seg.failed" after max_attempts passes, so it does not hold up the
+    segments behind it.
+
+fsync is batched (group commit): concurrent appenders share one fsync
+instead of paying one each.
+"""
+
+import atexit
+import glob
+import os
+import struct
+import threading
+import time
+import zlib
+
+import bson
+
+from log import get_logger, kv
+
+try:
+    import fcntl
+except ImportError:  # Windows (single process): open files cannot be renamed instead
+    fcntl = None
+
+logger = get_logger(__name__)
+
+_HEADER = struct.Struct("<II")
+
+
+def _try_lock(f):
+    """Take an exclusive flock on an open file without waiting; False if it is held."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _claim(path, target):
+    """
+    Lock path and rename it to target.
+
+    Returns:
+        file or None: The open file holding the lock (close it to release),
+                      or None if the file is gone or owned by a live process.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        if fcntl is None:
+            # No flock: the rename below fails while another process has the
+            # file open, and our handle must not block our own rename / delete
+            f.close()
+        elif not _try_lock(f):
+            f.close()
+            return None
+        os.rename(path, target)
+        return f
+    except (FileNotFoundError, PermissionError):
+        # Claimed by someone else meanwhile / still open elsewhere (Windows)
+        f.close()
+        return None
+
+
+def _segment_order(path):
+    """Sort key: segment creation time (ms), then writer pid and sequence."""
+    pid, created_ms, seq = os.path.basename(path).split(".", 1)[0].split("-")
+    return int(created_ms), int(pid), int(seq)
+
+
+def read_segment(path):
+    """
+    Read all valid records from a segment file.
+
+    Returns:
+        tuple: (events list, clean bool). clean is False if the file ended
+               in a torn or corrupt record (everything before it is returned).
+    """
+    events = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        if offset + _HEADER.size > len(data):
+            return events, False
+        length, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        body = data[start:start + length]
+        if len(body) != length or zlib.crc32(body) != crc:
+            return events, False
+        events.append(bson.decode(body))
+        offset = start + length
+    return events, True
+
+
+class EventSpool:
+    """
+    Append-only segment log with a background drainer.
+
+    Args:
+        directory (str): Spool directory (created if missing).
+        sink (callable): Called with a list of events to store them in bulk
+                         (e.g. db.insert_events). Raises on failure.
+        segment_bytes (int): Rotate the active segment past this size.
+        drain_interval (float): Seconds between drain passes. An idle,
+                                non-empty active segment is rotated after
+                                this long so its events get drained too.
+        drain_batch (int): Max events per sink call during replay.
+        fsync (bool): fsync before acking (disable only for benchmarks).
+        max_attempts (int): Failed drain passes before a segment is set
+                            aside as .seg.failed (counted only in passes
+                            where other segments were stored).
+    """
+
+    def __init__(self, directory, sink, segment_bytes=4 * 1024 * 1024,
+                 drain_interval=1.0, drain_batch=500, fsync=True, max_attempts=5):
+        self._dir = directory
+        self._sink = sink
+        self._segment_bytes = segment_bytes
+        self._drain_interval = drain_interval
+        self._drain_batch = max(1, drain_batch)
+        self._fsync = fsync
+        self._max_attempts = max(1, max_attempts)
+        self._attempts = {}  # segment name -> failed passes (this process)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._file = None
+        self._file_path = None
+        self._file_size = 0
+        self._file_opened_at = 0.0
+        self._segment_seq = 0
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._pid = None
+        self._thread = None
+        self._closed = False
+
+        # Metrics (read via stats())
+        self._appended_total = 0
+        self._drained_total = 0
+        self._drain_failures = 0
+        self._corrupt_segments = 0
+        self._failed_segments = 0
+        self._fsync_count = 0
+        self._last_drain_ms = 0.0
+
+    # -------------------------------------------------------------------------
+    # Write path
+    # -------------------------------------------------------------------------
+    def append(self, event):
+        """
+        Durably append an event. Returns once the record is on disk.
+
+        Raises:
+            OSError: If the spool cannot be written (caller should fall back
+                     to a direct insert).
+        """
+        if self._closed:
+            raise OSError("spool is closed")
+        self.start()
+        body = bson.encode(event)
+        record = _HEADER.pack(len(body), zlib.crc32(body)) + body
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(record)
+            self._file_size += len(record)
+            self._written_seq += 1
+            self._appended_total += 1
+            seq = self._written_seq
+            if self._file_size >= self._segment_bytes:
+                self._rotate_locked()
+        self._sync_to(seq)
+
+    def _sync_to(self, seq):
+        # Group commit: whoever holds _sync_lock fsyncs everything written so
+        # far; appenders queued behind it usually find their record covered.
+        if not self._fsync:
+            return
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                target = self._written_seq
+                f = self._file
+            if f is not None:
+                try:
+                    os.fsync(f.fileno())
+                    self._fsync_count += 1
+                except (ValueError, OSError):
+                    # Rotated (and fsync'd) while we waited; anything else is
+                    # a real write failure and must not be acked
+                    if not f.closed:
+                        raise
+            with self._lock:
+                self._synced_seq = max(self._synced_seq, target)
+
+    def _open_segment(self):
+        os.makedirs(self._dir, exist_ok=True)
+        self._segment_seq += 1
+        name = f"{os.getpid()}-{int(time.time() * 1000)}-{self._segment_seq:06d}.open"
+        self._file_path = os.path.join(self._dir, name)
+        self._file = open(self._file_path, "ab", buffering=0)
+        _try_lock(self._file)  # New file: nobody else can hold it yet
+        self._file_size = 0
+        self._file_opened_at = time.monotonic()
+
+    def _rotate_locked(self):
+        """Seal the active segment so the drainer can pick it up (holds _lock)."""
+        if self._file is None:
+            return
+        if self._fsync:
+            os.fsync(self._file.fileno())
+            self._fsync_count += 1
+        self._file.close()
+        try:
+            os.rename(self._file_path, self._file_path[:-len(".open")] + ".seg")
+        except FileNotFoundError:
+            pass  # Unlocked by close(): another process recovered it first
+        self._synced_seq = self._written_seq
+        self._file = None
+        self._file_path = None
+        self._file_size = 0
+
+    # -------------------------------------------------------------------------
+    # Drain path
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Start the drainer thread (once per process; safe to call after fork)."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            if self._pid is not None and self._pid != pid:
+                # Forked child: the parent's open segment belongs to the parent
+                # (close the inherited descriptor so the child does not keep
+                # its lock alive after the parent exits)
+                if self._file is not None:
+                    self._file.close()
+                self._file = None
+                self._file_path = None
+                self._file_size = 0
+            self._pid = pid
+            os.makedirs(self._dir, exist_ok=True)
+            self._recover_orphans()
+            self._thread = threading.Thread(
+                target=self._run, name="spool-drainer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _recover_orphans(self):
+        """
+        Requeue segments left behind by crashed / exited processes: active
+        (.open) or claimed (.seg.drain, or .seg.drain-<pid> from older
+        versions) files whose lock nobody holds any more.
+
+        Returns:
+            int: Number of files requeued.
+        """
+        recovered = 0
+        for path in glob.glob(os.path.join(self._dir, "*.open")):
+            f = _claim(path, path[:-len(".open")] + ".seg")
+            if f is not None:
+                f.close()
+                recovered += 1
+        for path in glob.glob(os.path.join(self._dir, "*.seg.drain*")):
+            f = _claim(path, path.split(".seg.drain", 1)[0] + ".seg")
+            if f is not None:
+                f.close()
+                recovered += 1
+        if recovered:
+            logger.warning("Recovered orphaned spool segments", extra=kv(count=recovered))
+        return recovered
+
+    def drain_once(self):
+        """
+        Replay every sealed segment into the sink and delete it.
+
+        Segments are claimed by lock + atomic rename, so concurrent drainers
+        in other workers never replay the same file. Each pass first requeues
+        orphaned segments (see _recover_orphans). If the sink fails, the
+        segment is released for a later retry; batches already written
+        before the failure will be replayed again (deduplicated by delivery
+        id in the database).
+
+        After a failure the next segment is tried too. If it fails as well,
+        the store is treated as down: the pass stops and the error is
+        raised. If other segments are stored in the same pass, the failing
+        ones are counted against max_attempts instead.
+
+        Returns:
+            int: Number of events written.
+        """
+        with self._lock:
+            if (self._file is not None and self._file_size
+                    and time.monotonic() - self._file_opened_at >= self._drain_interval):
+                self._rotate_locked()
+
+        self._recover_orphans()
+        written = 0
+        start = time.perf_counter()
+        stored_any = False
+        failed = []  # (segment path, error) released in this pass
+        for path in sorted(glob.glob(os.path.join(self._dir, "*.seg")), key=_segment_order):
+            claimed = path + ".drain"
+            lock = _claim(path, claimed)
+            if lock is None:
+                continue  # Another worker claimed it first
+            try:
+                events, clean = read_segment(claimed)
+                try:
+                    for i in range(0, len(events), self._drain_batch):
+                        self._sink(events[i:i + self._drain_batch])
+                except Exception as e:
+                    os.rename(claimed, path)
+                    with self._lock:
+                        self._drain_failures += 1
+                    if failed and not stored_any:
+                        raise  # Two in a row: the store is failing, not the data
+                    failed.append((path, e))
+                    continue
+                stored_any = True
+                self._attempts.pop(os.path.basename(path), None)
+                if clean:
+                    os.remove(claimed)
+                else:
+                    # Keep the unreadable tail around for inspection
+                    os.rename(claimed, path + ".corrupt")
+                    with self._lock:
+                        self._corrupt_segments += 1
+            finally:
+                lock.close()
+            written += len(events)
+            with self._lock:
+                self._drained_total += len(events)
+        if written:
+            self._last_drain_ms = (time.perf_counter() - start) * 1000
+        if failed and not stored_any:
+            raise failed[0][1]
+        for path, error in failed:
+            self._count_failure(path, error)
+        return written
+
+    def _count_failure(self, path, error):
+        """Count a failed pass for a segment; set it aside after max_attempts."""
+        name = os.path.basename(path)
+        attempts = self._attempts.get(name, 0) + 1
+        if attempts < self._max_attempts:
+            self._attempts[name] = attempts
+            return
+        self._attempts.pop(name, None)
+        lock = _claim(path, path + ".failed")
+        if lock is None:
+            return  # Drained or claimed by another worker meanwhile
+        lock.close()
+        with self._lock:
+            self._failed_segments += 1
+        logger.error("Spool segment keeps failing, set aside", extra=kv(
+            segment=name + ".failed", attempts=attempts, error=str(error)))
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self._drain_interval)
+            self._wakeup.clear()
+            try:
+                self.drain_once()
+            except Exception as e:
+                logger.error("Spool drain failed, will retry", extra=kv(error=str(e)))
+                time.sleep(min(5.0, self._drain_interval * 5))
+
+    def close(self):
+        """Seal the active segment and make a last drain attempt."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=5)
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._rotate_locked()
+        try:
+            self.drain_once()
+        except Exception as e:
+            logger.error("Spool final drain failed, events stay on disk for next start",
+                         extra=kv(error=str(e)))
+
+    def stats(self):
+        """
+        Snapshot of spool metrics.
+
+        Returns:
+            dict: pending segment count/bytes, appended/drained totals,
+                  fsync count, drain failures, corrupt / failed (set
+                  aside) segments and last drain latency.
+        """
+        sealed = glob.glob(os.path.join(self._dir, "*.seg"))
+        with self._lock:
+            return {
+                "directory": self._dir,
+                "pending_segments": len(sealed) + (1 if self._file is not None else 0),
+                "pending_bytes": sum(os.path.getsize(p) for p in sealed if os.path.exists(p))
+                                 + self._file_size,
+                "appended_total": self._appended_total,
+                "drained_total": self._drained_total,
+                "fsync_count": self._fsync_count,
+                "drain_failures": self._drain_failures,
+                "corrupt_segments": self._corrupt_segments,
+                "failed_segments": self._failed_segments,
+                "last_drain_ms": round(self._last_drain_ms, 3),
+            }
@@ -0,0 +1,300 @@
+"""
+Embedded SQLite storage engine (STORAGE_BACKEND=sqlite, or a sqlite://
+MONGO_URI).
+
+For small deployments and edge collectors that should not run MongoDB.
+The database is one file in WAL mode, so gunicorn workers share it:
+readers never block the writer, and each batch of events is one
+transaction. Ids are ObjectId hex strings (24 fixed-width lowercase hex
+characters sort like the ObjectIds themselves), so after_id cursors,
+latest_id and the API output are the same as with MongoDB.
+
+URIs follow the SQLAlchemy convention:
+    sqlite:///events.db          relative path
+    sqlite:////var/lib/events.db absolute path
+    sqlite:///:memory:           throwaway in-memory database (one process)
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from log import get_logger, kv, sampled
+from metrics import GET_EVENTS_SECONDS
+from query_planner import plan_events, shape_event
+from storage import EventStore
+from utils import to_utc_datetime
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Stored columns, in INSERT order; the first seven are the displayed ones
+_COLUMNS = ("id", "request_id", "author", "action", "from_branch", "to_branch", "ts", "delivery_id")
+
+_SCHEMA = (
+    # Clustered on id (no rowid): after_id range scans read the table in
+    # cursor order with no separate index
+    """CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        request_id TEXT,
+        author TEXT,
+        action TEXT,
+        from_branch TEXT,
+        to_branch TEXT,
+        ts INTEGER,
+        delivery_id TEXT
+    ) WITHOUT ROWID""",
+    # Covering index for the newest-first / since queries (ts = UTC
+    # microseconds; NULL sorts last in DESC, like a missing BSON date)
+    """CREATE INDEX IF NOT EXISTS events_ts ON events
+        (ts DESC, id DESC, request_id, author, action, from_branch, to_branch, delivery_id)""",
+    # One row per X-GitHub-Delivery id (NULLs are not compared)
+    "CREATE UNIQUE INDEX IF NOT EXISTS events_delivery_id ON events (delivery_id)",
+)
+
+# Statements are constant strings so sqlite3's per-connection statement
+# cache reuses the prepared form
+_SELECT = f"SELECT {', '.join(_COLUMNS[:7])} FROM events"
+_INSERT = f"INSERT INTO events ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+_AFTER_ID = f"{_SELECT} WHERE id > ? ORDER BY id LIMIT ?"
+_NEWEST = f"{_SELECT} ORDER BY ts DESC, id DESC LIMIT ?"
+_NEWEST_SINCE = f"{_SELECT} WHERE ts > ? ORDER BY ts DESC, id DESC LIMIT ?"
+_BEFORE_ID = f"{_SELECT} WHERE id < ? ORDER BY id DESC LIMIT ?"
+_RECENT = f"{_SELECT} ORDER BY id DESC LIMIT ?"
+_LATEST_ID = "SELECT id FROM events ORDER BY id DESC LIMIT 1"
+_EXISTING_DELIVERIES = "SELECT delivery_id FROM events WHERE delivery_id IN ({})"
+
+# SQLite's default limit on ? parameters per statement is 999 in old builds
+_MAX_PARAMS = 900
+
+
+def path_from_uri(uri):
+    """
+    Database path from a sqlite:// URI ("sqlite:///events.db" → "events.db").
+
+    Raises:
+        ValueError: If uri is not a sqlite URI.
+    """
+    if not uri.startswith("sqlite://"):
+        raise ValueError(f"Not a sqlite URI: {uri!r}")
+    path = uri[len("sqlite://"):]
+    if path.startswith("/"):
+        path = path[1:]
+    return path or ":memory:"
+
+
+def _to_micros(value):
+    dt = to_utc_datetime(value)
+    if dt is None:
+        return None
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _row_to_event(row):
+    return {
+        "_id": row[0],
+        "request_id": row[1],
+        "author": row[2],
+        "action": row[3],
+        "from_branch": row[4],
+        "to_branch": row[5],
+        "timestamp": _EPOCH + timedelta(microseconds=row[6]) if row[6] is not None else None,
+    }
+
+
+class SqliteEventStore(EventStore):
+    """
+    SQLite backend (see module docstring).
+
+    Args:
+        path (str): Database file, or ":memory:".
+        busy_timeout_ms (int): How long a writer waits for another
+                               process's transaction before failing.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self._path = path
+        self._busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._pid = None
+        # A :memory: database exists per connection, so all threads share
+        # one and take turns; file databases rely on SQLite's own locking
+        self._shared = None
+        self._guard = threading.RLock() if path == ":memory:" else contextlib.nullcontext()
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout_ms / 1000,
+            isolation_level=None,  # explicit BEGIN / COMMIT
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self._busy_timeout_ms)}")
+        if self._path != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+            # WAL + NORMAL: durable across app crashes, fsync at checkpoints
+            conn.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _conn(self):
+        # One connection per thread (and per process: never reuse a parent's
+        # connection after fork)
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._local = threading.local()
+                    self._connections = []
+                    self._shared = None
+                    self._pid = pid
+        if self._path == ":memory:":
+            with self._lock:
+                if self._shared is None:
+                    self._shared = self._connect()
+                    self._connections.append(self._shared)
+                return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write(self, events):
+        """Insert events in one transaction; returns the inserted ids."""
+        rows, ids, seen = [], [], set()
+        conn = self._conn()
+        with self._guard:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                deliveries = [e["delivery_id"] for e in events
+                              if isinstance(e.get("delivery_id"), str)]
+                existing = set()
+                for i in range(0, len(deliveries), _MAX_PARAMS):
+                    chunk = deliveries[i:i + _MAX_PARAMS]
+                    sql = _EXISTING_DELIVERIES.format(", ".join("?" * len(chunk)))
+                    existing.update(row[0] for row in conn.execute(sql, chunk))
+                for event in events:
+                    delivery_id = event.get("delivery_id")
+                    if not isinstance(delivery_id, str):
+                        delivery_id = None
+                    elif delivery_id in existing or delivery_id in seen:
+                        continue
+                    else:
+                        seen.add(delivery_id)
+                    doc_id = event.setdefault("_id", ObjectId())
+                    ids.append(doc_id)
+                    rows.append((str(doc_id), event.get("request_id"), event.get("author"),
+                                 event.get("action"), event.get("from_branch"),
+                                 event.get("to_branch"), _to_micros(event.get("timestamp")),
+                                 delivery_id))
+                conn.executemany(_INSERT, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def insert_event(self, event_data):
+        inserted = self._write([event_data])
+        if not inserted:
+            logger.info("Duplicate delivery ignored", extra=kv(delivery_id=event_data.get("delivery_id")))
+            return None
+        if sampled():
+            logger.info("Stored event", extra=kv(action=event_data.get("action"),
+                                                  author=event_data.get("author")))
+        return inserted[0]
+
+    def insert_events(self, events):
+        if not events:
+            return []
+        inserted_ids = self._write(events)
+        if len(inserted_ids) < len(events):
+            logger.info("Skipped duplicate deliveries in batch",
+                        extra=kv(count=len(events) - len(inserted_ids)))
+        if sampled():
+            logger.info("Stored event batch", extra=kv(count=len(inserted_ids)))
+        return inserted_ids
+
+    def _query(self, sql, params):
+        with self._guard:
+            return self._conn().execute(sql, params).fetchall()
+
+    def get_events(self, since_timestamp=None, after_id=None, limit=100, before_id=None):
+        plan = plan_events(since_timestamp, after_id, before_id, limit)
+        with GET_EVENTS_SECONDS.labels(plan.mode).time():
+            if plan.by_id and plan.ascending:
+                rows = self._query(_AFTER_ID, (str(plan.after or ""), plan.limit))
+            elif plan.by_id and plan.before is not None:
+                rows = self._query(_BEFORE_ID, (str(plan.before), plan.limit))
+            elif plan.by_id:
+                rows = self._query(_RECENT, (plan.limit,))
+            elif plan.since is not None:
+                rows = self._query(_NEWEST_SINCE, (_to_micros(plan.since), plan.limit))
+            else:
+                rows = self._query(_NEWEST, (plan.limit,))
+        return plan.finish([_row_to_event(row) for row in rows])
+
+    def get_latest_id(self):
+        row = self._query(_LATEST_ID, ())
+        return row[0][0] if row else None
+
+    def get_recent_events(self, limit=1000):
+        rows = self._query(_RECENT, (limit,))
+        rows.reverse()
+        return [shape_event(_row_to_event(row)) for row in rows]
+
+    def delete_all_events(self):
+        conn = self._conn()
+        with self._guard:
+            deleted = conn.execute("DELETE FROM events").rowcount
+        self.generation += 1
+        return deleted
+
+    def stats(self):
+        count = self._query("SELECT COUNT(*) FROM events", ())[0][0]
+        size = 0
+        if self._path != ":memory:":
+            for suffix in ("", "-wal"):  # committed pages not yet checkpointed live in -wal
+                if os.path.exists(self._path + suffix):
+                    size += os.path.getsize(self._path + suffix)
+        return {
+            "backend": self.name,
+            "path": self._path,
+            "events": count,
+            "dataSize": f"{size / 1024:.2f} KB",
+        }
+
+    def warm_up(self):
+        self._conn()
+        return True
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            owned = self._pid == os.getpid()
+            self._local = threading.local()
+            self._shared = None
+        if not owned:
+            return
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning("SQLite close failed", extra=kv(error=str(e)))
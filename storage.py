@@ -0,0 +1,218 @@
+"""
+Pluggable event storage.
+
+EventStore is the interface the app stores and reads events through;
+get_store() returns this process's store for STORAGE_BACKEND:
+
+  - "mongo" (default): MongoEventStore, the PyMongo helpers in db.py.
+  - "sqlite": SqliteEventStore (sqlite_store.py), an embedded WAL-mode
+    file named by a sqlite:/// MONGO_URI; for small deployments and edge
+    collectors.
+  - "memory": MemoryEventStore (memory_store.py), no external services;
+    for load-testing the HTTP layer and single-node dev instances.
+
+Every backend runs the plans from query_planner.py and returns the same
+shapes as db.py: displayed fields only, string _id, timestamps formatted
+by utils.format_utc, latest_id for the next after_id poll.
+"""
+
+import asyncio
+import threading
+
+import db
+from config import MONGO_URI, MONGO_DB_NAME, SQLITE_BUSY_TIMEOUT_MS, STORAGE_BACKEND, WEB_CONCURRENCY
+from log import get_logger, kv
+
+logger = get_logger(__name__)
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+# SQLite file when MONGO_URI is not a sqlite:// URI
+_DEFAULT_SQLITE_URI = "sqlite:///events.db"
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class EventStore:
+    """
+    Storage interface (see db.py for the full argument / return docs).
+
+    Attributes:
+        name (str): Backend name reported by /test-db and logs.
+        can_watch (bool): watch_inserts() is supported (cross-process
+                          insert notifications for the event feed).
+        blocking (bool): Calls do I/O; AsyncEventStore runs them in a
+                         worker thread instead of on the event loop.
+        generation (int): Incremented by each delete_all_events() in this
+                          process; part of the /api/events ETag, so tags
+                          issued before a delete stop matching.
+    """
+
+    name = "abstract"
+    can_watch = False
+    blocking = False
+    generation = 0
+
+    def insert_event(self, event_data):
+        """Store one event; returns its _id, or None for a duplicate delivery_id."""
+        raise NotImplementedError
+
+    def insert_events(self, events):
+        """Store a batch (duplicates skipped); returns the inserted _ids."""
+        raise NotImplementedError
+
+    def get_events(self, since_timestamp=None, after_id=None, limit=100, before_id=None):
+        """Events planned by query_planner.plan_events; returns (events, latest_id)."""
+        raise NotImplementedError
+
+    def get_latest_id(self):
+        """Newest _id (insertion order) as a string, or None."""
+        raise NotImplementedError
+
+    def get_recent_events(self, limit=1000):
+        """Newest events by insertion order, oldest first."""
+        raise NotImplementedError
+
+    def watch_inserts(self, callback):
+        """Block and call callback() for every insert (only if can_watch)."""
+        raise NotImplementedError
+
+    def delete_all_events(self):
+        """Delete every event (and bump generation); returns the number deleted."""
+        raise NotImplementedError
+
+    def stats(self):
+        """Backend description and size for /test-db."""
+        return {"backend": self.name}
+
+    def warm_up(self):
+        """Connect ahead of the first request; returns True if ready."""
+        return True
+
+    def close(self):
+        """Release connections / files held by this process."""
+
+
+class MongoEventStore(EventStore):
+    """MongoDB backend: delegates to the helpers in db.py."""
+
+    name = "mongo"
+    can_watch = True
+    blocking = True
+
+    def insert_event(self, event_data):
+        return db.insert_event(event_data)
+
+    def insert_events(self, events):
+        return db.insert_events(events)
+
+    def get_events(self, since_timestamp=None, after_id=None, limit=100, before_id=None):
+        return db.get_events(since_timestamp=since_timestamp, after_id=after_id, limit=limit,
+                             before_id=before_id)
+
+    def get_latest_id(self):
+        return db.get_latest_id()
+
+    def get_recent_events(self, limit=1000):
+        return db.get_recent_events(limit)
+
+    def watch_inserts(self, callback):
+        return db.watch_inserts(callback)
+
+    def delete_all_events(self):
+        deleted = db.delete_all_events()
+        self.generation += 1
+        return deleted
+
+    def stats(self):
+        stats = db.get_db().command("dbStats")
+        return {
+            "backend": self.name,
+            "database": MONGO_DB_NAME,
+            "uri": MONGO_URI.split("@")[-1],  # hide credentials
+            "collections": stats.get("collections", 0),
+            "dataSize": f"{stats.get('dataSize', 0) / 1024:.2f} KB",
+        }
+
+    def warm_up(self):
+        return db.warm_up()
+
+    def close(self):
+        db.close_client()
+
+
+class AsyncEventStore:
+    """
+    asyncio wrapper around an EventStore for the ASGI app (same methods as
+    async_db.py). Blocking backends run in a worker thread.
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    async def _call(self, fn, *args, **kwargs):
+        if self._store.blocking:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def warm_up(self):
+        return await self._call(self._store.warm_up)
+
+    async def insert_event(self, event_data):
+        return await self._call(self._store.insert_event, event_data)
+
+    async def insert_events(self, events):
+        return await self._call(self._store.insert_events, events)
+
+    async def get_events(self, since_timestamp=None, after_id=None, limit=100, before_id=None):
+        return await self._call(self._store.get_events, since_timestamp=since_timestamp,
+                                after_id=after_id, limit=limit, before_id=before_id)
+
+    async def get_latest_id(self):
+        return await self._call(self._store.get_latest_id)
+
+    async def close(self):
+        await self._call(self._store.close)
+
+
+def get_store():
+    """
+    This process's EventStore for STORAGE_BACKEND (created on first use).
+
+    Raises:
+        ValueError: If STORAGE_BACKEND names an unknown backend.
+    """
+    global _store
+    store = _store
+    if store is not None:
+        return store
+    with _store_lock:
+        if _store is None:
+            _store = _create_store(STORAGE_BACKEND)
+        return _store
+
+
+def use_store(store):
+    """Install a store for this process instead of the STORAGE_BACKEND one (load tests)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def _create_store(backend):
+    if backend == "mongo":
+        return MongoEventStore()
+    if backend == "sqlite":
+        from sqlite_store import SqliteEventStore, path_from_uri
+        uri = MONGO_URI if MONGO_URI.startswith("sqlite:") else _DEFAULT_SQLITE_URI
+        path = path_from_uri(uri)
+        logger.info("Using SQLite storage", extra=kv(path=path))
+        return SqliteEventStore(path, busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS)
+    if backend == "memory":
+        from memory_store import MemoryEventStore
+        if WEB_CONCURRENCY > 1:
+            logger.warning("In-memory storage is per process; workers will not share events",
+                           extra=kv(workers=WEB_CONCURRENCY))
+        return MemoryEventStore()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected one of {', '.join(BACKENDS)})")
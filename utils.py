@@ -0,0 +1,59 @@
+"""
+Helper functions shared across the webhook-repo.
+
+Timestamps are stored as native (BSON) UTC datetimes and only turned into
+the display string "YYYY-MM-DD HH:MM:SS UTC" at the API boundary.
+"""
+
+from datetime import datetime, timezone
+
+# Display / API format for event timestamps (what the UI parses)
+UTC_DISPLAY_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+
+
+def utc_now():
+    """Current UTC time as an aware datetime, truncated to whole seconds."""
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def to_utc_datetime(value):
+    """
+    Parse a timestamp into an aware UTC datetime.
+
+    Accepts ISO 8601 strings from GitHub ("2021-04-01T21:30:00Z",
+    "+05:30" offsets, ...), our legacy stored format
+    ("2021-04-01 21:30:00 UTC") and datetime objects (naive = UTC, as
+    returned by PyMongo without tz_aware).
+
+    Returns:
+        datetime or None: Aware UTC datetime, or None if value is empty or
+                          cannot be parsed.
+    """
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, str) and value.strip():
+        s = value.strip()
+        if s.endswith(" UTC"):
+            s = s[:-4] + "+00:00"
+        s = s.replace("Z", "+00:00")
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            return None
+    else:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def format_utc(value):
+    """
+    Format a stored timestamp for the API/UI ("YYYY-MM-DD HH:MM:SS UTC").
+
+    Legacy string values (stored before the datetime migration) are
+    returned unchanged.
+    """
+    if isinstance(value, datetime):
+        return to_utc_datetime(value).strftime(UTC_DISPLAY_FORMAT)
+    return value
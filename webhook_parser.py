@@ -7,7 +7,7 @@ Handles:
   - Merged PR events → MERGE action (brownie points)
 """
 
-from datetime import datetime, timezone
+import json
 
 from constants import (
     ACTION_PUSH,
@@ -16,26 +16,32 @@ from constants import (
     GITHUB_EVENT_PUSH,
     GITHUB_EVENT_PULL_REQUEST,
 )
+from log import get_logger, kv
+from utils import to_utc_datetime, utc_now
 
+logger = get_logger(__name__)
 
-def _timestamp_to_utc_str(timestamp_str):
+
+# Top-level push payload keys _parse_push_event reads, as they appear in
+# GitHub's JSON ("key": value). Used by the selective extraction path.
+_PUSH_FIELD_KEYS = tuple(f'"{k}":'.encode() for k in ("ref", "after", "pusher", "head_commit"))
+
+# First window decoded for a selected value; grows 4x until the value fits
+_SELECT_WINDOW = 4096
+
+_json_decoder = json.JSONDecoder()
+
+
+def _timestamp_to_utc(timestamp_str):
     """
-    Parse GitHub timestamp (ISO 8601) and return a single pattern: UTC string.
-    Ensures push and pull_request times are stored in the same UTC pattern.
+    Parse GitHub timestamp (ISO 8601, any offset) into an aware UTC datetime.
+    Push and pull_request times are stored the same way (native BSON date);
+    falls back to the current time if the value is missing or malformed.
     """
-    if not timestamp_str:
-        return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    # Handle Z and +00:00, and any other offset (e.g. +05:30)
-    s = timestamp_str.strip().replace("Z", "+00:00")
-    try:
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is not None:
-            dt = dt.astimezone(timezone.utc)
-        else:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-    except Exception:
-        return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+    dt = to_utc_datetime(timestamp_str)
+    if dt is None:
+        return utc_now()
+    return dt
 
 
 def parse_github_webhook(payload, event_type):
@@ -55,7 +61,7 @@ def parse_github_webhook(payload, event_type):
                 "action": str,          # PUSH, PULL_REQUEST, or MERGE
                 "from_branch": str,     # Source branch
                 "to_branch": str,       # Target branch
-                "timestamp": str        # UTC datetime string
+                "timestamp": datetime   # UTC (stored as a BSON date)
             }
     
     Returns None if event type is not supported.
@@ -69,6 +75,55 @@ def parse_github_webhook(payload, event_type):
         return None
 
 
+def extract_push_event(raw_body):
+    """
+    Parse a push event straight from the raw body without decoding it all.
+    
+    Push payloads can carry hundreds of commits with full file lists, but
+    _parse_push_event only needs ref, after, pusher and head_commit. This
+    locates those top-level keys in the raw bytes and decodes just their
+    values, so commits[] is never materialized.
+    
+    A JSON string cannot contain an unescaped '"key":' sequence, so a match
+    is always a real object key. The path gives up (returns None) whenever it
+    cannot be sure it found the top-level field: a key that occurs more than
+    once (nested objects), a missing ref/head_commit, an unreadable value or
+    a null head_commit (branch deletion). Callers then use the full parser.
+    
+    Args:
+        raw_body (bytes): Raw webhook body.
+    
+    Returns:
+        dict or None: Event document (same as parse_github_webhook), or None
+                      if the selective path cannot answer.
+    """
+    fields = {}
+    for key in _PUSH_FIELD_KEYS:
+        pos = raw_body.find(key)
+        if pos < 0:
+            continue
+        if raw_body.find(key, pos + 1) >= 0:
+            return None  # Ambiguous: key also appears in a nested object
+        pos += len(key)
+        window = _SELECT_WINDOW
+        while True:
+            # Decode a window after the key; a value cut off by the window
+            # edge fails to parse and the window grows until it fits
+            chunk = raw_body[pos:pos + window].decode("utf-8", "ignore").lstrip()
+            try:
+                value, _ = _json_decoder.raw_decode(chunk)
+                break
+            except ValueError:
+                if pos + window >= len(raw_body):
+                    return None
+                window *= 4
+        fields[key[1:-2].decode()] = value
+    
+    if "ref" not in fields or not isinstance(fields.get("head_commit"), dict):
+        return None
+    return _parse_push_event(fields)
+
+
 def _parse_push_event(payload):
     """
     Parse GitHub push event and convert to MongoDB schema.
@@ -96,8 +151,8 @@ def _parse_push_event(payload):
         ref = payload.get("ref", "")
         branch_name = ref.replace("refs/heads/", "") if ref.startswith("refs/heads/") else ref
         
-        # Extract timestamp: same UTC pattern for all event types
-        timestamp_utc = _timestamp_to_utc_str(head_commit.get("timestamp", ""))
+        # Extract timestamp: UTC datetime for all event types
+        timestamp_utc = _timestamp_to_utc(head_commit.get("timestamp", ""))
         
         return {
             "request_id": commit_id[:40] if commit_id else "",  # Commit hash (40 chars)
@@ -108,7 +163,7 @@ def _parse_push_event(payload):
             "timestamp": timestamp_utc,
         }
     except Exception as e:
-        print(f"❌ Error parsing push event: {e}")
+        logger.warning("Error parsing push event", extra=kv(error=str(e)))
         return None
 
 
@@ -158,9 +213,9 @@ def _parse_pull_request_event(payload):
         from_branch = pr.get("head", {}).get("ref", "")  # PR source branch
         to_branch = pr.get("base", {}).get("ref", "")    # PR target branch
         
-        # Extract timestamp: same UTC pattern as push (always normalized to UTC)
+        # Extract timestamp: UTC datetime, same as push
         updated_at = pr.get("updated_at", "") or pr.get("created_at", "")
-        timestamp_utc = _timestamp_to_utc_str(updated_at)
+        timestamp_utc = _timestamp_to_utc(updated_at)
         
         return {
             "request_id": request_id,
@@ -171,5 +226,5 @@ def _parse_pull_request_event(payload):
             "timestamp": timestamp_utc,
         }
     except Exception as e:
-        print(f"❌ Error parsing pull_request event: {e}")
+        logger.warning("Error parsing pull_request event", extra=kv(error=str(e)))
         return None
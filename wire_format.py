@@ -0,0 +1,116 @@
+"""
+Wire formats for /api/events.
+
+  - json (default): "events" is a list of objects, as before.
+  - columnar: one array per field under "columns" (same order, newest
+    first) instead of repeating the keys in every object. Low-cardinality
+    fields (author, action, branches) hold indexes into a shared "strings"
+    table, so each distinct author or branch name is sent once. "indexed"
+    lists the fields encoded that way.
+
+?fields=author,action,... keeps only those fields (plus _id, which the
+cursor needs) in either format.
+
+Columnar only shrinks the repeated parts: _id, request_id (commit SHAs)
+and timestamp are still sent in full for every event. On a generated
+1000-event page that is about 2x smaller than json uncompressed but only
+about 1.1x after gzip (compression.py already removes most repetition,
+and the SHAs do not compress). Dropping fields with ?fields= saves more:
+the same page without request_id is about 4x smaller after gzip.
+
+Example (format=columnar):
+    {"format": "columnar", "count": 2, "latest_id": "...",
+     "strings": ["dev", "PUSH", "main"],
+     "indexed": ["author", "action", "from_branch", "to_branch"],
+     "columns": {"_id": ["...", "..."], "author": [0, 0], "action": [1, 1], ...}}
+"""
+
+from query_planner import DISPLAY_FIELDS
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMATS = (FORMAT_JSON, FORMAT_COLUMNAR)
+
+# Few distinct values, repeated across events: sent through the string table
+STRING_TABLE_FIELDS = ("author", "action", "from_branch", "to_branch")
+
+
+def parse_fields(value):
+    """
+    Parse the ?fields= parameter.
+
+    Args:
+        value (str or None): Comma-separated field names.
+
+    Returns:
+        tuple or None: Requested display fields in DISPLAY_FIELDS order, or
+                       None for all of them.
+
+    Raises:
+        ValueError: If a field is not one of DISPLAY_FIELDS.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    requested.discard("_id")
+    unknown = requested.difference(DISPLAY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))} "
+                         f"(expected: {', '.join(DISPLAY_FIELDS)})")
+    return tuple(field for field in DISPLAY_FIELDS if field in requested)
+
+
+def parse_format(value):
+    """
+    Parse the ?format= parameter (default json).
+
+    Raises:
+        ValueError: If value is not a known format.
+    """
+    fmt = (value or FORMAT_JSON).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {value!r} (expected: {', '.join(FORMATS)})")
+    return fmt
+
+
+def encode_events(events, fields=None, fmt=FORMAT_JSON):
+    """
+    Response fields carrying events in the requested format.
+
+    Args:
+        events (list[dict]): Events as returned by get_events (not modified).
+        fields (tuple, optional): Fields to keep (see parse_fields).
+        fmt (str): FORMAT_JSON or FORMAT_COLUMNAR.
+
+    Returns:
+        dict: {"events": [...]} for json; format / strings / indexed /
+              columns for columnar.
+    """
+    fields = fields or DISPLAY_FIELDS
+    if fmt == FORMAT_COLUMNAR:
+        return _columnar(events, fields)
+    if fields == DISPLAY_FIELDS:
+        return {"events": events}
+    return {"events": [{"_id": e["_id"], **{f: e.get(f) for f in fields}} for e in events]}
+
+
+def _columnar(events, fields):
+    strings, index = [], {}
+    columns = {"_id": [e["_id"] for e in events]}
+    indexed = [field for field in fields if field in STRING_TABLE_FIELDS]
+    for field in fields:
+        values = [e.get(field) for e in events]
+        if field in STRING_TABLE_FIELDS:
+            encoded = []
+            for value in values:
+                if value is None:
+                    encoded.append(None)
+                    continue
+                i = index.get(value)
+                if i is None:
+                    i = index[value] = len(strings)
+                    strings.append(value)
+                encoded.append(i)
+            values = encoded
+        columns[field] = values
+    return {"format": FORMAT_COLUMNAR, "strings": strings, "indexed": indexed, "columns": columns}